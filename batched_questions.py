@@ -0,0 +1,192 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from config import DATA_DIR
+from providers import get_text_llm
+from quiz_generator import TEXT_MODEL, Question, QuizData, question_prompt, save_to_json
+from quiz_store import BATCH_FILES
+from response_cache import CacheMissError, cache_key, get_response_cache
+from telemetry import span
+
+# Question items (indicator x batch) packed into one structured request
+ITEMS_PER_REQUEST = 6
+# Rounds of re-requesting only the items that were missing or invalid
+MAX_ROUNDS = 3
+
+# --- Pydantic Schemas for Batched Output ---
+class BatchedItem(BaseModel):
+    item_id: str = Field(description="The id of the request this item answers, copied exactly (e.g. 'q3')")
+    batch: str = Field(description="The batch of the request, copied exactly: A, B or C")
+    questions: List[Question] = Field(description="List of 3 questions for this request")
+
+class BatchedQuizData(BaseModel):
+    items: List[BatchedItem] = Field(description="Exactly one item per request, in any order")
+
+# --- Validation ---
+def validate_questions(questions: List[dict]) -> Optional[str]:
+    """Why a question list is unusable, or None if it is fine."""
+    if not questions:
+        return "no questions"
+    for i, q in enumerate(questions):
+        labels = [opt["label"].strip().upper() for opt in q["options"]]
+        if sorted(labels) != ["A", "B", "C", "D"]:
+            return f"question {i + 1} has options {labels}, expected A-D"
+        if q["correct_option_label"].strip().upper() not in labels:
+            return f"question {i + 1} marks {q['correct_option_label']!r} as correct"
+    return None
+
+def _instruction(prompt: str) -> str:
+    # The per-item format note is replaced by one for the whole request
+    return re.sub(r"\s*Output as JSON\.\s*$", "", prompt)
+
+def batched_prompt(items: List[dict]) -> str:
+    lines = [
+        "Answer every request below. Return exactly one item per request, with its id and batch copied exactly, "
+        "each with 3 multiple-choice questions that have options A, B, C and D.",
+    ]
+    for item in items:
+        lines.append(f"[id={item['item_id']} batch={item['batch']}] {_instruction(item['prompt'])}")
+    lines.append("Output as JSON.")
+    return "\n".join(lines)
+
+def question_items(jobs: List[dict]) -> List[dict]:
+    """
+    One item per missing question batch. `jobs` are dicts with "key" (the quiz
+    record, e.g. 'Text [gpt-image-2]'), "indicator" (used in the prompt),
+    "batches" (e.g. ["A", "B", "C"]) and "scenario_context" (needed for C).
+    """
+    items = []
+    for job in jobs:
+        for batch in job["batches"]:
+            items.append({
+                "item_id": f"q{len(items)}",
+                "key": job["key"],
+                "batch": batch,
+                "prompt": question_prompt(batch, job["indicator"], job.get("scenario_context")),
+            })
+    return items
+
+# --- Generation ---
+def generate_questions_batched(items: List[dict], items_per_request: int = ITEMS_PER_REQUEST,
+                               max_rounds: int = MAX_ROUNDS, use_batch_api: bool = False,
+                               max_concurrency: int = 4, throttle: Optional[Callable[[str], None]] = None,
+                               on_item_complete: Optional[Callable[[dict, List[dict]], None]] = None) -> dict:
+    """
+    Generates the questions for many (indicator, batch) items with few structured
+    requests, each packing up to `items_per_request` items into BatchedQuizData.
+    Every returned item is validated on its own; only the missing or invalid ones
+    are re-requested, for up to `max_rounds` rounds. With use_batch_api the
+    requests of a round go out through the model's batch() call (LangChain runs
+    them concurrently and returns per-request exceptions); otherwise they are
+    invoked on a thread pool. Responses go through the response cache.
+    `on_item_complete(item, questions)` is called for every valid item.
+    Returns {"questions": {item_id: [question dicts]}, "failed": {item_id: reason},
+    "requests": number of provider requests, "rounds": rounds used}.
+    """
+    pending = list(items)
+    questions: Dict[str, List[dict]] = {}
+    failed: Dict[str, str] = {}
+    stats = {"requests": 0, "rounds": 0}
+
+    with span("llm.batched", provider=TEXT_MODEL, items=len(items)) as s:
+        for _ in range(max(1, max_rounds)):
+            if not pending:
+                break
+            stats["rounds"] += 1
+            chunks = [pending[i:i + items_per_request] for i in range(0, len(pending), items_per_request)]
+            responses = _request_chunks(chunks, use_batch_api, max_concurrency, throttle, stats)
+
+            pending = []
+            for chunk, (response, key) in zip(chunks, responses):
+                if isinstance(response, Exception):
+                    for item in chunk:
+                        failed[item["item_id"]] = f"{type(response).__name__}: {response}"
+                    pending.extend(chunk)
+                    continue
+                answers = {(a["item_id"], a["batch"]): a["questions"] for a in response["items"]}
+                complete = True
+                for item in chunk:
+                    item_questions = answers.get((item["item_id"], item["batch"]))
+                    reason = "missing from the response" if item_questions is None else validate_questions(item_questions)
+                    if reason:
+                        failed[item["item_id"]] = reason
+                        pending.append(item)
+                        complete = False
+                        continue
+                    failed.pop(item["item_id"], None)
+                    questions[item["item_id"]] = item_questions
+                    if on_item_complete:
+                        on_item_complete(item, item_questions)
+                # Only fully valid responses are cached; a partial one must not answer the retry
+                if complete and key:
+                    get_response_cache().put(key, TEXT_MODEL, response)
+            if pending:
+                print(f"⚠️ {len(pending)} of {len(items)} question items failed validation; retrying only those")
+
+        s.set(requests=stats["requests"], rounds=stats["rounds"], failures=len(failed))
+    print(f"✅ {len(questions)} question items in {stats['requests']} requests ({len(failed)} failed)")
+    return {"questions": questions, "failed": failed, **stats}
+
+def _request_chunks(chunks: List[List[dict]], use_batch_api: bool, max_concurrency: int,
+                    throttle: Optional[Callable[[str], None]], stats: dict) -> list:
+    """
+    (BatchedQuizData dict or exception, cache key to store it under or None) per
+    chunk; cached responses are returned as they are instead of being re-sent.
+    """
+    cache = get_response_cache()
+    prompts = [batched_prompt(chunk) for chunk in chunks]
+    keys = [cache_key(TEXT_MODEL, prompt, BatchedQuizData) for prompt in prompts]
+    responses: list = [(cache.get(key), None) for key in keys]
+    misses = [i for i, (response, _) in enumerate(responses) if response is None]
+    if misses and cache.offline:
+        raise CacheMissError(f"{len(misses)} batched requests are not cached (offline mode)")
+    if not misses:
+        return responses
+
+    structured = get_text_llm(TEXT_MODEL).with_structured_output(BatchedQuizData, include_raw=True)
+    stats["requests"] += len(misses)
+
+    def send(i):
+        if throttle:
+            throttle(TEXT_MODEL)
+        return structured.invoke(prompts[i])
+
+    if use_batch_api:
+        for i in misses:
+            if throttle:
+                throttle(TEXT_MODEL)
+        results = structured.batch([prompts[i] for i in misses], config={"max_concurrency": max_concurrency},
+                                   return_exceptions=True)
+    else:
+        def attempt(i):
+            try:
+                return send(i)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            results = list(pool.map(attempt, misses))
+
+    for i, result in zip(misses, results):
+        # A response that could not be parsed fails its chunk like a provider error would
+        if not isinstance(result, Exception):
+            try:
+                result = _parsed(result)
+            except ValueError as e:
+                result = e
+        responses[i] = (result, None) if isinstance(result, Exception) else (result, keys[i])
+    return responses
+
+def _parsed(output) -> dict:
+    """The BatchedQuizData dict of an include_raw response, or ValueError if it was not parsed."""
+    if not output or output.get("parsing_error") or output.get("parsed") is None:
+        error = output.get("parsing_error") if output else "empty response"
+        raise ValueError(f"Structured output could not be parsed: {error}")
+    return output["parsed"].dict()
+
+def save_item(item: dict, item_questions: List[dict], data_dir: str = DATA_DIR) -> List[dict]:
+    """Appends one validated item to its batch file, like the per-batch pipeline steps do; returns what was saved."""
+    return save_to_json(os.path.join(data_dir, BATCH_FILES[item["batch"]]), item["key"], QuizData(questions=item_questions))
@@ -0,0 +1,125 @@
+"""
+Measures the near-duplicate index: build throughput, lookup latency as the corpus grows, and recall.
+
+    python benchmarks/bench_dedup.py --sizes 1000 10000 100000 [--output results.json]
+
+Every corpus is made of random questions over a large vocabulary, with
+`--duplicate-rate` of them planted as near-duplicates of an earlier question
+(one or two words swapped). Recall is measured over the planted pairs whose
+exact shingle Jaccard reaches the threshold. Lookups go through the LSH
+buckets, so their cost should stay flat as the corpus grows; a linear scan
+is timed for comparison.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db import connect
+from dedup import DedupIndex, _unpack, minhash, shingles, similarity
+
+def vocabulary(rng: random.Random, size: int = 5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+def build_questions(count: int, duplicate_rate: float, seed: int = 0):
+    """Question texts plus the (duplicate, original) index pairs that were planted."""
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    texts, planted = [], []
+    for i in range(count):
+        if texts and rng.random() < duplicate_rate:
+            original = rng.randrange(len(texts))
+            tokens = texts[original].rstrip("?").split()
+            for _ in range(rng.randint(1, 2)):
+                tokens[rng.randrange(len(tokens))] = rng.choice(words)
+            texts.append(" ".join(tokens) + "?")
+            planted.append((i, original))
+        else:
+            texts.append("Which " + " ".join(rng.choice(words) for _ in range(rng.randint(12, 24))) + "?")
+    return texts, planted
+
+def run(size: int, duplicate_rate: float, probes: int, workdir: str):
+    texts, planted = build_questions(size, duplicate_rate)
+    index = DedupIndex(os.path.join(workdir, f"dedup_{size}.db"))
+    records = [("A", f"indicator {i}", [{"question_text": text}]) for i, text in enumerate(texts)]
+
+    start = time.perf_counter()
+    index.rebuild(records, {})
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    probe_texts = [texts[rng.randrange(size)] for _ in range(probes)]
+    start = time.perf_counter()
+    for text in probe_texts:
+        index.find_similar(text)
+    lookup_ms = (time.perf_counter() - start) * 1000 / probes
+
+    # Linear scan over every stored signature, what a lookup would cost without the buckets
+    with connect(index.db_path) as conn:
+        signatures = [_unpack(row[0]) for row in conn.execute("SELECT signature FROM fingerprints")]
+    start = time.perf_counter()
+    for text in probe_texts[:10]:
+        signature = minhash(text)
+        [s for s in signatures if similarity(signature, s) >= index.threshold]
+    scan_ms = (time.perf_counter() - start) * 1000 / min(10, probes)
+
+    start = time.perf_counter()
+    report = index.report()
+    report_seconds = time.perf_counter() - start
+
+    # Recall counts the planted pairs whose exact shingle Jaccard reaches the threshold
+    def jaccard(a, b):
+        a, b = shingles(a), shingles(b)
+        return len(a & b) / len(a | b)
+    expected = [(dup, original) for dup, original in planted
+                if jaccard(texts[dup], texts[original]) >= index.threshold]
+
+    clustered = {}
+    for n, cluster in enumerate(report["details"]):
+        for doc in cluster["texts"]:
+            clustered[doc["doc_id"]] = n
+    doc = lambda i: f"A:indicator {i}:0"
+    found = sum(1 for dup, original in expected
+                if doc(dup) in clustered and clustered[doc(dup)] == clustered.get(doc(original)))
+    planted_docs = {doc(i) for pair in planted for i in pair}
+    return {
+        "questions": size,
+        "build_per_second": round(size / build_seconds),
+        "lookup_ms": round(lookup_ms, 2),
+        "linear_scan_ms": round(scan_ms, 2),
+        "report_seconds": round(report_seconds, 2),
+        "candidate_pairs": report["candidate_pairs"],
+        "planted_duplicates": len(planted),
+        "above_threshold": len(expected),
+        "recall": round(found / len(expected), 4) if expected else None,
+        "unplanted_in_clusters": sum(1 for d in clustered if d not in planted_docs),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = [run(size, args.duplicate_rate, args.probes, workdir) for size in args.sizes]
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Reports bytes and encode time per image for the derivative pipeline.
+
+    python benchmarks/bench_image_derivatives.py [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import image_derivatives
+from image_derivatives import DERIVATIVE_WIDTHS, get_derivative
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+def run(image_dir: str, fmt: str):
+    results = []
+    # Encode into a throwaway cache so every variant is measured cold
+    with tempfile.TemporaryDirectory() as cache_dir:
+        image_derivatives.CACHE_DIR = cache_dir
+        for name in sorted(os.listdir(image_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            src = os.path.join(image_dir, name)
+            entry = {"image": name, "original_bytes": os.path.getsize(src), "variants": {}}
+            for width in DERIVATIVE_WIDTHS:
+                start = time.perf_counter()
+                path = get_derivative(src, width, fmt)
+                entry["variants"][width] = {
+                    "bytes": os.path.getsize(path),
+                    "encode_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+            results.append(entry)
+
+    original = sum(r["original_bytes"] for r in results)
+    summary = {
+        "images": len(results),
+        "format": fmt,
+        "original_bytes": original,
+        "variant_bytes": {w: sum(r["variants"][w]["bytes"] for r in results) for w in DERIVATIVE_WIDTHS},
+    }
+    summary["reduction"] = {w: round(original / max(1, b), 1) for w, b in summary["variant_bytes"].items()}
+    return {"summary": summary, "images": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--image-dir", default=os.path.join(ROOT_DIR, "indicator_explainer_images"))
+    parser.add_argument("--format", default="webp", choices=["webp", "jpeg"])
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.image_dir, args.format), indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
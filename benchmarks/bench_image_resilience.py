@@ -0,0 +1,110 @@
+"""
+Compares image p50/p99 latency and missing-image rate with and without the retry engine.
+
+    python benchmarks/bench_image_resilience.py --requests 400 --failure-rate 0.1 --tail-rate 0.02
+
+Both runs use fake backends with the same latency profile: a base latency, a
+`tail_rate` share of slow calls and a `failure_rate` share of transient
+errors. "single" makes one call per image, like the pipeline used to;
+"engine" goes through resilience.ImageRetryEngine (retries, hedging, fallback),
+after `--warmup` untimed requests have filled its latency history, as they
+would in a long-running process.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+# Keep benchmark spans out of the repo's traces.jsonl
+os.environ.setdefault("QUIZ_TRACE_FILE", "")
+
+import providers
+from quiz_generator import generate_image
+from resilience import ImageGenerationFailed, ImageRetryEngine
+
+MODELS = ("gemini-3-pro-image", "gpt-image-2")
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+def run(name, generate_one, requests: int, concurrency: int, workdir: str):
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            outcome = generate_one(os.path.join(workdir, f"{name}_{i}.png"))
+        except Exception:
+            outcome = None
+        return time.perf_counter() - start, outcome
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    seconds = [s for s, _ in results]
+    outcomes = [o for _, o in results if isinstance(o, dict)]
+    missing = sum(1 for i in range(requests) if not os.path.exists(os.path.join(workdir, f"{name}_{i}.png")))
+    report = {
+        "p50_ms": round(percentile(seconds, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(seconds, 0.99) * 1000, 1),
+        "missing_rate": round(missing / requests, 4),
+    }
+    if outcomes:
+        report["retries"] = sum(o["retries"] for o in outcomes)
+        report["hedges"] = sum(o["hedges"] for o in outcomes)
+        report["fallbacks"] = sum(1 for o in outcomes if o["fallback"])
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base fake image latency (s)")
+    parser.add_argument("--tail-rate", type=float, default=0.02, help="Share of slow calls (hedging only helps below 1 - p95)")
+    parser.add_argument("--tail-latency", type=float, default=1.0, help="Latency of a slow call (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Share of transient failures")
+    parser.add_argument("--attempt-timeout", type=float, default=2.0)
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed engine requests before measuring")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+    # Progress prints (from any thread, e.g. the viewer's warm-up) go to stderr; stdout is only the JSON
+    stdout, sys.stdout = sys.stdout, sys.stderr
+
+    for model_id in MODELS:
+        providers.register_image_backend(model_id, lambda model_id=model_id: providers.FakeImageBackend(
+            model_id, args.latency, args.failure_rate, args.tail_rate, args.tail_latency))
+
+    # Short backoff and a low sample threshold so hedging kicks in within a benchmark-sized run
+    engine = ImageRetryEngine(base_delay=0.02, max_delay=0.2, attempt_timeout=args.attempt_timeout,
+                              deadline=args.attempt_timeout * 4, hedge_min_samples=10)
+
+    def single(path):
+        generate_image("A water cycle diagram", path, MODELS[0])
+
+    def resilient(path):
+        try:
+            return engine.generate("A water cycle diagram", path, MODELS[0], generate_image)
+        except ImageGenerationFailed as e:
+            return e.outcome
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = {
+            "profile": {key: getattr(args, key) for key in ("latency", "tail_rate", "tail_latency", "failure_rate")},
+            "single": run("single", single, args.requests, args.concurrency, workdir),
+        }
+        run("warmup", resilient, args.warmup, args.concurrency, workdir)
+        report["engine"] = run("engine", resilient, args.requests, args.concurrency, workdir)
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text, file=stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Import-time profile (`python -X importtime`) of the viewer and generator entry points.
+
+    python benchmarks/bench_import_time.py [--output report.json]
+    python benchmarks/bench_import_time.py --baseline "" --output benchmarks/import_time_baseline.json
+
+Each module is imported in a fresh interpreter. The report lists the total
+cumulative import time and the slowest imported modules. It fails (exit 1) if
+a module listed in LAZY_MODULES is pulled in by the viewer at startup, or if
+a total grew by more than --tolerance over the baseline (by default the
+committed import_time_baseline.json, recorded with requirements.txt and
+pydantic installed; the second command above refreshes it).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_time_baseline.json")
+
+ENTRY_POINTS = ["quiz_display", "viewer_data", "quiz_generator", "bulk_generate"]
+
+# Must only be imported lazily (background warm-up or first Generate click), never at viewer startup
+VIEWER_ENTRY_POINTS = ["quiz_display", "viewer_data"]
+LAZY_MODULES = ["quiz_generator", "providers", "pydantic", "langchain", "langchain_core", "openai", "google.genai"]
+
+def profile(module: str, top: int):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"}
+
+    imported = {name for name, _, _ in rows}
+    entry = next((r for r in rows if r[0] == module), None)
+    return {
+        "total_ms": round(entry[2] / 1000, 1) if entry else None,
+        "modules": len(rows),
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+            for name, own, cum in sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+        ],
+        "lazy_modules_imported": sorted(m for m in LAZY_MODULES if m in imported),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Write JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Earlier report to compare totals against ('' to skip)")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed total_ms growth factor over the baseline")
+    args = parser.parse_args()
+
+    report = {module: profile(module, args.top) for module in args.modules}
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    failures = []
+    for module in VIEWER_ENTRY_POINTS:
+        leaked = report.get(module, {}).get("lazy_modules_imported")
+        if leaked:
+            failures.append(f"{module} imports {', '.join(leaked)} at startup")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for module, entry in report.items():
+            before = baseline.get(module, {}).get("total_ms")
+            after = entry.get("total_ms")
+            if before and after and after > before * args.tolerance:
+                failures.append(f"{module} import time {after} ms exceeds baseline {before} ms x{args.tolerance}")
+
+    for failure in failures:
+        print(f"⚠️ {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+"""
+Measures provider setup and first-call versus warm-call latency.
+
+    python benchmarks/bench_provider_startup.py [--real] [--calls 5] [--output results.json]
+
+By default the local fake backends are measured (no credentials needed), which
+isolates the registry overhead; --real hits the configured Gemini/OpenAI backends.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import providers
+
+PROMPT = "A simple diagram of the water cycle for kids."
+
+def measure(model_id: str, calls: int, workdir: str):
+    start = time.perf_counter()
+    backend = providers.get_image_backend(model_id)
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    call_ms = []
+    for i in range(calls):
+        start = time.perf_counter()
+        backend.generate(PROMPT, os.path.join(workdir, f"{model_id}_{i}.png"))
+        call_ms.append((time.perf_counter() - start) * 1000)
+
+    warm = sorted(call_ms[1:]) or call_ms
+    return {
+        "setup_ms": round(setup_ms, 2),
+        "first_call_ms": round(call_ms[0], 2),
+        "warm_call_median_ms": round(warm[len(warm) // 2], 2),
+        # Second lookup must hit the registry, not build a new client
+        "reused_instance": providers.get_image_backend(model_id) is backend,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--real", action="store_true", help="Use the real provider backends")
+    parser.add_argument("--models", nargs="+", default=["gemini-3-pro-image", "gpt-image-2"])
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    if not args.real:
+        providers.use_fake_providers(image_models=args.models)
+
+    process_start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {model_id: measure(model_id, args.calls, workdir) for model_id in args.models}
+    report = json.dumps({
+        "backends": "real" if args.real else "fake",
+        "models": results,
+        "total_ms": round((time.perf_counter() - process_start) * 1000, 2),
+    }, indent=4)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
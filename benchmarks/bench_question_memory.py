@@ -0,0 +1,108 @@
+"""
+Measures memory per 10k questions: JSON dicts versus compact records versus NumPy columns.
+
+    python benchmarks/bench_question_memory.py --questions 10000 [--output results.json]
+
+A synthetic corpus (same fields as the real batch files, every indicator in all
+three batches) is serialised to JSONL lines first; then each representation is
+built from those lines under tracemalloc and the retained size is reported.
+"dicts" is what the viewer used to hold, "records" is compact_questions'
+QuestionRecord list and "table" its QuestionTable (skipped without numpy).
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (ROOT_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from compact_questions import QuestionTable, compact_questions
+from quiz_store import BATCH_FILES
+from synthetic_corpus import GRADES, IMAGE_MODELS, SUBJECTS, WORDS, synthetic_question
+
+def build_lines(questions: int, per_batch: int, seed: int = 0):
+    """JSONL lines per batch, as stored in the segments, plus the indicator meta map."""
+    rng = random.Random(seed)
+    indicators = max(1, questions // (per_batch * len(BATCH_FILES)))
+    lines, meta = [], {}
+    for n in range(indicators):
+        model = IMAGE_MODELS[n % len(IMAGE_MODELS)]
+        indicator = f"{n + 1}. Synthetic indicator about {' '.join(rng.choice(WORDS) for _ in range(8))}. [{model}]"
+        meta[indicator] = f"Grade {rng.choice(GRADES)} - {rng.choice(SUBJECTS)}"
+        for batch in BATCH_FILES:
+            record = {"indicator": indicator, "questions": [synthetic_question(rng, i) for i in range(per_batch)]}
+            lines.append((batch, json.dumps(record)))
+    return lines, meta
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, {"retained_mb": round(current / 2**20, 2), "peak_mb": round(peak / 2**20, 2),
+                   "build_ms": round(seconds * 1000, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10000)
+    parser.add_argument("--per-batch", type=int, default=3, help="Questions per indicator and batch")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    lines, meta = build_lines(args.questions, args.per_batch)
+    count = sum(args.per_batch for _ in lines)
+    per_10k = 10000 / count
+
+    def as_dicts():
+        # Keyed per batch like the old viewer: {batch: {indicator: record}}
+        data = {batch: {} for batch in BATCH_FILES}
+        for batch, line in lines:
+            record = json.loads(line)
+            data[batch][record["indicator"]] = record
+        return data
+
+    def as_records():
+        records = []
+        for batch, line in lines:
+            record = json.loads(line)
+            records.extend(compact_questions(record["questions"], record["indicator"], batch))
+        return records
+
+    report = {"questions": count}
+    _, report["dicts"] = measure(as_dicts)
+    records, report["records"] = measure(as_records)
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        report["table"] = {"skipped": "numpy is not installed"}
+    else:
+        table, report["table"] = measure(lambda: QuestionTable.from_records(records, meta))
+        start = time.perf_counter()
+        table.answer_distribution(), table.per_grade_counts(), table.length_stats()
+        report["table"]["analytics_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    for name in ("dicts", "records", "table"):
+        if "retained_mb" in report[name]:
+            report[name]["mb_per_10k_questions"] = round(report[name]["retained_mb"] * per_10k, 2)
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
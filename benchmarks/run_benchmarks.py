@@ -0,0 +1,155 @@
+"""
+Benchmark and load-test suite for the viewer and the generator.
+
+    python benchmarks/run_benchmarks.py --indicators 2000 --output results.json
+
+Builds a synthetic corpus in a scratch directory (see synthetic_corpus.py),
+then measures:
+  * render: cold and warm rerun time of quiz_display.py run headless through
+    Streamlit's AppTest, per batch and for a search query
+  * memory: tracemalloc current/peak and max RSS after the render runs
+  * throughput: bulk generation against fake providers with configurable
+    latency and failure rate, at several worker counts
+Results are written as JSON (with the git commit) so runs can be compared.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (ROOT_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def _ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def bench_render(data_dir: str, reruns: int):
+    from streamlit.testing.v1 import AppTest
+
+    tracemalloc.start()
+    at = AppTest.from_file(os.path.join(ROOT_DIR, "quiz_display.py"), default_timeout=300)
+
+    start = time.perf_counter()
+    at.run()
+    results = {"cold_ms": _ms(start), "batches": {}}
+
+    for option in at.sidebar.radio[0].options:
+        at.sidebar.radio[0].set_value(option)
+        start = time.perf_counter()
+        at.run()
+        first = _ms(start)
+        warm = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            warm.append(_ms(start))
+        warm.sort()
+        results["batches"][option.split(":")[0]] = {
+            "first_ms": first,
+            "warm_median_ms": warm[len(warm) // 2] if warm else None,
+            "warm_max_ms": warm[-1] if warm else None,
+        }
+
+    start = time.perf_counter()
+    at.sidebar.text_input[0].input("moon phase").run()
+    results["search_ms"] = _ms(start)
+    results["exceptions"] = [str(e.value) for e in at.exception]
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    memory = {
+        "traced_current_mb": round(current / 2**20, 2),
+        "traced_peak_mb": round(peak / 2**20, 2),
+        # ru_maxrss is KiB on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+    }
+    return results, memory
+
+def bench_throughput(data_dir: str, indicators: int, workers_list, latency: float, image_latency: float,
+                     failure_rate: float):
+    import providers
+    from bulk_generate import DEFAULT_RATE_LIMITS, run_bulk
+
+    providers.use_fake_providers(latency=latency, image_latency=image_latency, failure_rate=failure_rate)
+    unlimited = {model: 1e9 for model in DEFAULT_RATE_LIMITS}
+    results = {}
+    for workers in workers_list:
+        # Unique indicators per run so the response cache never short-circuits a call
+        jobs = [(f"Throughput indicator {workers}-{i}", "gemini-3-pro-image") for i in range(indicators)]
+        backend = providers.get_image_backend("gemini-3-pro-image")
+        calls = backend.calls
+        summary = run_bulk(jobs, os.path.join(data_dir, f"ledger_{workers}.jsonl"), workers=workers,
+                           rate_limits=unlimited)
+        results[workers] = {
+            "seconds": round(summary["seconds"], 3),
+            "succeeded": summary["succeeded"],
+            "failed": len(summary["failed"]),
+            "indicators_per_hour": round(summary["indicators_per_hour"], 1),
+            # Two per indicator (standard and gamified) unless something was served from the cache
+            "image_calls": backend.calls - calls,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--indicators", type=int, default=1000, help="Corpus size N")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per batch M")
+    parser.add_argument("--images", type=int, default=1, help="Images per indicator and kind K")
+    parser.add_argument("--reruns", type=int, default=5, help="Warm reruns measured per batch")
+    parser.add_argument("--gen-indicators", type=int, default=20, help="Indicators generated per throughput run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake text-call latency (s)")
+    parser.add_argument("--image-latency", type=float, default=0.2, help="Fake image-call latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--skip-render", action="store_true")
+    parser.add_argument("--skip-throughput", action="store_true")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+    # Progress prints (from any thread, e.g. the viewer's warm-up) go to stderr; stdout is only the JSON
+    stdout, sys.stdout = sys.stdout, sys.stderr
+
+    with tempfile.TemporaryDirectory(prefix="quiz_bench_") as data_dir:
+        # Must be set before any repo module is imported: they resolve their data paths at import
+        os.environ["QUIZ_DATA_DIR"] = data_dir
+        from synthetic_corpus import build_corpus
+
+        start = time.perf_counter()
+        corpus = build_corpus(data_dir, args.indicators, args.questions, args.images)
+        corpus["build_ms"] = _ms(start)
+        corpus.pop("output_dir")
+
+        report = {"commit": git_commit(), "python": sys.version.split()[0], "corpus": corpus}
+        if not args.skip_render:
+            report["render"], report["memory"] = bench_render(data_dir, args.reruns)
+        if not args.skip_throughput:
+            report["throughput"] = {
+                "fake_latency_s": args.latency,
+                "fake_image_latency_s": args.image_latency,
+                "failure_rate": args.failure_rate,
+                "by_workers": bench_throughput(data_dir, args.gen_indicators, args.workers, args.latency,
+                                               args.image_latency, args.failure_rate),
+            }
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text, file=stdout)
+
+if __name__ == "__main__":
+    main()
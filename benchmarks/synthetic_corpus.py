@@ -0,0 +1,90 @@
+"""
+Builds a synthetic corpus (N indicators x M questions x K images) in the real on-disk layout.
+
+    python benchmarks/synthetic_corpus.py OUTPUT_DIR --indicators 1000 --questions 3 --images 1
+
+OUTPUT_DIR gets quiz_data*.jsonl segments, a quiz_catalog.db and an
+indicator_explainer_images/ directory, i.e. exactly what the viewer and
+generator read when QUIZ_DATA_DIR points at it.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from catalog import Catalog
+from providers import FakeImageBackend
+from quiz_store import BATCH_FILES
+
+IMAGE_MODELS = ["gemini-3-pro-image", "gpt-image-2"]
+SUBJECTS = ["Math", "Science", "English", "Social Studies"]
+GRADES = [3, 4, 5, 6, 7, 8, 9]
+WORDS = ("energy moon phase fraction number place value acid base circuit plant cell "
+         "orbit force motion rounding digit water cycle habitat angle area volume").split()
+
+def synthetic_question(rng: random.Random, i: int) -> dict:
+    """A question dict with the same fields as quiz_generator.Question."""
+    topic = " ".join(rng.choice(WORDS) for _ in range(6))
+    return {
+        "question_text": f"Question {i + 1}: which statement best describes {topic}?",
+        "options": [{"label": label, "text": f"{label}) {' '.join(rng.choice(WORDS) for _ in range(4))}"} for label in "ABCD"],
+        "correct_option_label": rng.choice("ABCD"),
+        "explanation": f"Because {' '.join(rng.choice(WORDS) for _ in range(12))}.",
+    }
+
+def build_corpus(output_dir: str, indicators: int, questions: int, images: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    image_dir = os.path.join(output_dir, "indicator_explainer_images")
+    os.makedirs(image_dir, exist_ok=True)
+
+    # One tiny PNG copied under every name keeps the corpus fast to build
+    sample_image = os.path.join(image_dir, "_sample.png")
+    FakeImageBackend().generate("sample", sample_image)
+    with open(sample_image, "rb") as f:
+        image_bytes = f.read()
+
+    catalog = Catalog(os.path.join(output_dir, "quiz_catalog.db"), seed_file=None)
+    segments = {batch: open(os.path.join(output_dir, os.path.splitext(name)[0] + ".jsonl"), "w", encoding="utf-8")
+                for batch, name in BATCH_FILES.items()}
+    try:
+        for n in range(indicators):
+            model = IMAGE_MODELS[n % len(IMAGE_MODELS)]
+            indicator = f"{n + 1}. Synthetic indicator about {' '.join(rng.choice(WORDS) for _ in range(8))}. [{model}]"
+            for batch, segment in segments.items():
+                record = {"indicator": indicator, "questions": [synthetic_question(rng, i) for i in range(questions)]}
+                segment.write(json.dumps(record) + "\n")
+
+            std_files = [f"std_synthetic_{n}_{k}.jpg" for k in range(images)]
+            gamified_files = [f"gamified_synthetic_{n}_{k}.png" for k in range(images)]
+            for filename in std_files + gamified_files:
+                with open(os.path.join(image_dir, filename), "wb") as f:
+                    f.write(image_bytes)
+
+            catalog.set_images(indicator, "standard", std_files, model)
+            catalog.set_images(indicator, "gamified", gamified_files, model)
+            for filename in gamified_files:
+                catalog.set_scenario_context(filename, f"Welcome to the game! {' '.join(rng.choice(WORDS) for _ in range(30))}.")
+            catalog.set_meta(indicator, f"Grade {rng.choice(GRADES)} - {rng.choice(SUBJECTS)}")
+    finally:
+        for segment in segments.values():
+            segment.close()
+
+    return {"indicators": indicators, "questions_per_batch": questions, "images_per_kind": images, "output_dir": output_dir}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--indicators", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--images", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(build_corpus(args.output_dir, args.indicators, args.questions, args.images, args.seed), indent=4))
+
+if __name__ == "__main__":
+    main()
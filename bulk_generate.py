@@ -0,0 +1,269 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+# Requests per minute allowed for each provider model (override with --rate MODEL=RPM)
+DEFAULT_RATE_LIMITS = {
+    "gemini-3-pro-image": 10,
+    "gpt-image-2": 10,
+    "gemini-2.5-flash": 60,
+}
+
+DEFAULT_LEDGER = "bulk_ledger.jsonl"
+
+# --- Input Parsing ---
+def read_indicators(filepath: str, default_model: str) -> List[Tuple[str, str]]:
+    """
+    Reads (indicator, image_model) pairs from a CSV, JSONL or plain text file.
+    CSV files use an `indicator` column (or the first column) and an optional
+    `image_model` column. JSONL lines are either strings or objects with the same keys.
+    """
+    jobs = []
+    ext = os.path.splitext(filepath)[1].lower()
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            reader = csv.reader(f)
+            header = next(reader, [])
+            lowered = [h.strip().lower() for h in header]
+            if "indicator" in lowered:
+                ind_col = lowered.index("indicator")
+                model_col = lowered.index("image_model") if "image_model" in lowered else None
+            else:
+                # No header row: the first line is already an indicator
+                ind_col, model_col = 0, None
+                reader = [header] + list(reader)
+            for row in reader:
+                if len(row) > ind_col and row[ind_col].strip():
+                    model = row[model_col].strip() if model_col is not None and len(row) > model_col and row[model_col].strip() else default_model
+                    jobs.append((row[ind_col].strip(), model))
+        elif ext == ".jsonl":
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                if isinstance(item, str):
+                    jobs.append((item.strip(), default_model))
+                else:
+                    jobs.append((item["indicator"].strip(), item.get("image_model") or default_model))
+        else:
+            jobs = [(line.strip(), default_model) for line in f if line.strip()]
+    return jobs
+
+# --- Rate Limiting ---
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `per_minute` calls per minute with bursts up to `burst`.
+    """
+    def __init__(self, per_minute: float, burst: Optional[int] = None):
+        if per_minute <= 0:
+            raise ValueError(f"Rate limit must be positive, got {per_minute} requests per minute")
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, int(per_minute // 6)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+# --- Job Ledger ---
+class JobLedger:
+    """
+    Append-only JSONL record of finished steps per job, so an interrupted run
+    resumes from the last completed step instead of starting the indicator over.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.done = set()
+        if os.path.exists(filepath):
+            with open(filepath, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a truncated last line behind
+                        continue
+                    if entry.get("status") == "done":
+                        self.done.add(entry["job"])
+                    else:
+                        self.steps.setdefault(entry["job"], {})[entry["step"]] = entry["result"]
+
+    def _append(self, entry: dict):
+        with self.lock:
+            with open(self.filepath, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def completed_steps(self, job: str) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.steps.get(job, {}))
+
+    def record_step(self, job: str, step: str, result: Any):
+        self._append({"job": job, "step": step, "result": result})
+        with self.lock:
+            self.steps.setdefault(job, {})[step] = result
+
+    def mark_done(self, job: str):
+        self._append({"job": job, "status": "done"})
+        with self.lock:
+            self.done.add(job)
+
+# --- Bulk Runner ---
+def run_bulk(jobs: List[Tuple[str, str]], ledger_path: str = DEFAULT_LEDGER, workers: int = 4,
+             step_workers: int = 5, rate_limits: Optional[Dict[str, float]] = None, batched: bool = False,
+             items_per_request: int = 6, use_batch_api: bool = False):
+    """
+    Generates quizzes for many indicators on a bounded worker pool, sharing one
+    rate limiter per provider model across all workers. Returns a summary dict.
+    With `batched`, the workers only generate prompts and images; the Batch A/B/C
+    questions of every indicator are then generated together, `items_per_request`
+    (indicator, batch) items per structured request (see batched_questions.py).
+    """
+    from quiz_generator import generate_quiz_for_indicator
+
+    ledger = JobLedger(ledger_path)
+    limiters = {model: RateLimiter(rpm) for model, rpm in {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}.items()}
+
+    def throttle(model_id):
+        limiter = limiters.get(model_id)
+        if limiter:
+            limiter.acquire()
+
+    todo = [(ind, model) for ind, model in jobs if f"{ind} [{model}]" not in ledger.done]
+    print(f"📋 {len(jobs)} indicators, {len(jobs) - len(todo)} already done, {len(todo)} to generate")
+
+    def run_job(indicator, image_model):
+        job = f"{indicator} [{image_model}]"
+        generate_quiz_for_indicator(
+            indicator, image_model, max_workers=step_workers,
+            completed=ledger.completed_steps(job),
+            on_step_complete=lambda step, result: ledger.record_step(job, step, result),
+            throttle=throttle, include_questions=not batched,
+        )
+        if not batched:
+            ledger.mark_done(job)
+        return job
+
+    start = time.perf_counter()
+    succeeded, failed, staged = 0, [], []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_job, ind, model): (ind, model) for ind, model in todo}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                if batched:
+                    staged.append(futures[future])
+                else:
+                    succeeded += 1
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"⚠️ Failed {futures[future][0]} [{futures[future][1]}]: {e}")
+
+    summary: Dict[str, Any] = {}
+    if staged:
+        done, question_failed, summary["question_requests"] = finish_batched_questions(
+            staged, ledger, throttle, items_per_request, use_batch_api, workers)
+        succeeded += len(done)
+        failed += question_failed
+
+    elapsed = time.perf_counter() - start
+    per_hour = succeeded / elapsed * 3600 if elapsed > 0 else 0.0
+    print(f"🎉 {succeeded} generated, {len(failed)} failed in {elapsed:.1f}s ({per_hour:.1f} indicators/hour)")
+    summary.update({"succeeded": succeeded, "failed": failed, "seconds": elapsed, "indicators_per_hour": per_hour})
+    return summary
+
+def finish_batched_questions(jobs: List[Tuple[str, str]], ledger: JobLedger, throttle, items_per_request: int,
+                             use_batch_api: bool, max_concurrency: int):
+    """
+    Generates the question batches still missing for `jobs` (whose prompts and
+    images are done) in packed requests, saving and recording each valid item as
+    it arrives. Returns (done jobs, failed jobs, number of requests sent).
+    """
+    from batched_questions import generate_questions_batched, question_items, save_item
+    from quiz_generator import BATCH_STEPS
+
+    specs = []
+    for indicator, image_model in jobs:
+        job = f"{indicator} [{image_model}]"
+        steps = ledger.completed_steps(job)
+        specs.append({
+            "key": job,
+            "indicator": indicator,
+            "batches": [batch for batch, step in BATCH_STEPS.items() if step not in steps],
+            "scenario_context": steps["gamified_prompt"][1],
+        })
+    items = question_items(specs)
+    print(f"📋 {len(items)} question batches for {len(jobs)} indicators, {items_per_request} per request")
+
+    def on_item_complete(item, questions):
+        ledger.record_step(item["key"], BATCH_STEPS[item["batch"]], save_item(item, questions))
+
+    result = generate_questions_batched(items, items_per_request, use_batch_api=use_batch_api,
+                                        max_concurrency=max_concurrency, throttle=throttle,
+                                        on_item_complete=on_item_complete)
+    failed_keys = {item["key"] for item in items if item["item_id"] in result["failed"]}
+    done, failed = [], []
+    for (indicator, image_model), spec in zip(jobs, specs):
+        if spec["key"] in failed_keys:
+            failed.append((indicator, image_model))
+            print(f"⚠️ Failed {spec['key']}: some question batches never validated")
+        else:
+            ledger.mark_done(spec["key"])
+            done.append((indicator, image_model))
+    return done, failed, result["requests"]
+
+def parse_rate(value: str) -> Tuple[str, float]:
+    model, _, rpm = value.partition("=")
+    if not model or not rpm:
+        raise argparse.ArgumentTypeError("expected MODEL=REQUESTS_PER_MINUTE")
+    try:
+        per_minute = float(rpm)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{rpm!r} is not a number of requests per minute")
+    if not per_minute > 0:
+        raise argparse.ArgumentTypeError(f"rate for {model} must be a positive number of requests per minute")
+    return model, per_minute
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate quizzes for every indicator in a CSV/JSONL/text file.")
+    parser.add_argument("input", help="File of indicators (.csv, .jsonl or one indicator per line)")
+    parser.add_argument("--image-model", default="gemini-3-pro-image", help="Image model when the file does not specify one")
+    parser.add_argument("--workers", type=int, default=4, help="Indicators generated in parallel")
+    parser.add_argument("--step-workers", type=int, default=5, help="Concurrent steps within one indicator")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER, help="Job ledger used to resume interrupted runs")
+    parser.add_argument("--rate", type=parse_rate, action="append", default=[], help="Rate limit override, e.g. gpt-image-2=5")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while the run lasts")
+    parser.add_argument("--batched", action="store_true", help="Generate questions for many indicators per request")
+    parser.add_argument("--items-per-request", type=int, default=6, help="Question batches packed into one request with --batched")
+    parser.add_argument("--batch-api", action="store_true", help="With --batched, send each round through the model's batch() call")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port:
+        from telemetry import start_metrics_server
+        start_metrics_server(args.metrics_port)
+
+    jobs = read_indicators(args.input, args.image_model)
+    summary = run_bulk(jobs, args.ledger, args.workers, args.step_workers, dict(args.rate), args.batched,
+                       args.items_per_request, args.batch_api)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
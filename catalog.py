@@ -0,0 +1,293 @@
+import ast
+import os
+import pickle
+import re
+from typing import Dict, List, Optional
+
+from config import BASE_DIR, data_path
+from db import connect, init_db
+
+DEFAULT_DB_PATH = data_path("quiz_catalog.db")
+SEED_FILE = os.path.join(BASE_DIR, "catalog_seed.py")
+
+# Bump whenever SCHEMA or the layout returned by Catalog.all_maps() changes,
+# so stale snapshots are ignored instead of unpickled into the wrong shape
+SNAPSHOT_VERSION = 3
+
+# Image kinds: "standard" images back Batch A & B, "gamified" images back Batch C
+IMAGE_KINDS = ("standard", "gamified")
+
+# Which dict literal (in catalog_seed.py or an old quiz_display.py) feeds which table
+LEGACY_MAPS = {
+    "STANDARD_IMAGE_MAP": "standard",
+    "GAMIFIED_IMAGE_MAP": "gamified",
+    "SCENARIO_CONTEXT_MAP": "scenario_context",
+    "INDICATOR_META_MAP": "meta",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_images (
+    indicator   TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    filename    TEXT NOT NULL,
+    image_model TEXT,
+    PRIMARY KEY (indicator, kind, position)
+);
+CREATE INDEX IF NOT EXISTS idx_images_model ON indicator_images (image_model);
+
+-- Per-model images of one indicator generated in a side-by-side comparison
+CREATE TABLE IF NOT EXISTS image_variants (
+    indicator   TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    image_model TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    filename    TEXT NOT NULL,
+    PRIMARY KEY (indicator, kind, image_model, position)
+);
+
+CREATE TABLE IF NOT EXISTS scenario_context (
+    filename TEXT PRIMARY KEY,
+    context  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS indicator_meta (
+    indicator   TEXT PRIMARY KEY,
+    meta        TEXT NOT NULL,
+    grade       TEXT,
+    subject     TEXT,
+    image_model TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_meta_grade_subject ON indicator_meta (grade, subject);
+CREATE INDEX IF NOT EXISTS idx_meta_model ON indicator_meta (image_model);
+"""
+
+_MODEL_SUFFIX = re.compile(r"\s\[([^\[\]]+)\]$")
+_GRADE_SUBJECT = re.compile(r"^(Grade\s+\S+)\s*-\s*(.+)$")
+
+def image_model_of(indicator: str) -> Optional[str]:
+    """Returns the image model from an indicator key like 'Text [gpt-image-2]'."""
+    match = _MODEL_SUFFIX.search(indicator)
+    return match.group(1) if match else None
+
+def base_indicator_of(indicator: str) -> str:
+    """Returns an indicator key without its image model: 'Text [gpt-image-2]' -> 'Text'."""
+    return _MODEL_SUFFIX.sub("", indicator)
+
+def parse_meta(meta: str):
+    """Splits 'Grade 3 - Math' into ('Grade 3', 'Math'); other labels give (None, None)."""
+    match = _GRADE_SUBJECT.match(meta.strip())
+    return (match.group(1), match.group(2).strip()) if match else (None, None)
+
+class Catalog:
+    """
+    SQLite-backed store for the indicator -> image / scenario context / meta maps.
+    Every write is a single indexed transaction, so it is safe to call from
+    concurrent generation steps and processes.
+    """
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, seed_file: Optional[str] = SEED_FILE):
+        self.db_path = db_path
+        is_new = not os.path.exists(db_path)
+        init_db(self.db_path, SCHEMA)
+        if is_new and seed_file and os.path.exists(seed_file):
+            migrate_from_source(seed_file, self)
+
+
+    # --- Writes ---
+    def set_images(self, indicator: str, kind: str, filenames: List[str], image_model: Optional[str] = None):
+        if kind not in IMAGE_KINDS:
+            raise ValueError(f"Unknown image kind: {kind}")
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        image_model = image_model or image_model_of(indicator)
+        with connect(self.db_path) as conn:
+            conn.execute("DELETE FROM indicator_images WHERE indicator = ? AND kind = ?", (indicator, kind))
+            conn.executemany(
+                "INSERT INTO indicator_images (indicator, kind, position, filename, image_model) VALUES (?, ?, ?, ?, ?)",
+                [(indicator, kind, pos, name, image_model) for pos, name in enumerate(filenames)],
+            )
+
+    def set_variant_images(self, indicator: str, kind: str, image_model: str, filenames: List[str]):
+        """Stores one model's images for an indicator; other models' variants are kept."""
+        if kind not in IMAGE_KINDS:
+            raise ValueError(f"Unknown image kind: {kind}")
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        with connect(self.db_path) as conn:
+            conn.execute("DELETE FROM image_variants WHERE indicator = ? AND kind = ? AND image_model = ?",
+                         (indicator, kind, image_model))
+            conn.executemany(
+                "INSERT INTO image_variants (indicator, kind, image_model, position, filename) VALUES (?, ?, ?, ?, ?)",
+                [(indicator, kind, image_model, pos, name) for pos, name in enumerate(filenames)],
+            )
+
+    def set_scenario_context(self, filename: str, context: str):
+        with connect(self.db_path) as conn:
+            conn.execute("INSERT OR REPLACE INTO scenario_context (filename, context) VALUES (?, ?)", (filename, context))
+
+    def set_meta(self, indicator: str, meta: str):
+        grade, subject = parse_meta(meta)
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indicator_meta (indicator, meta, grade, subject, image_model) VALUES (?, ?, ?, ?, ?)",
+                (indicator, meta, grade, subject, image_model_of(indicator)),
+            )
+
+    # --- Reads ---
+    def get_images(self, indicator: str, kind: str) -> List[str]:
+        with connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT filename FROM indicator_images WHERE indicator = ? AND kind = ? ORDER BY position",
+                (indicator, kind),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_scenario_context(self, filename: str) -> Optional[str]:
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT context FROM scenario_context WHERE filename = ?", (filename,)).fetchone()
+        return row[0] if row else None
+
+    def get_meta(self, indicator: str) -> Optional[str]:
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT meta FROM indicator_meta WHERE indicator = ?", (indicator,)).fetchone()
+        return row[0] if row else None
+
+    def image_map(self, kind: str) -> Dict[str, List[str]]:
+        """All images of one kind as {indicator: [filenames]}, in a single query."""
+        image_map: Dict[str, List[str]] = {}
+        with connect(self.db_path) as conn:
+            for indicator, filename in conn.execute(
+                "SELECT indicator, filename FROM indicator_images WHERE kind = ? ORDER BY indicator, position", (kind,)
+            ):
+                image_map.setdefault(indicator, []).append(filename)
+        return image_map
+
+    def image_model_map(self, kind: str) -> Dict[str, str]:
+        """{indicator: model that drew its first image of this kind}, where recorded."""
+        with connect(self.db_path) as conn:
+            return dict(conn.execute(
+                "SELECT indicator, image_model FROM indicator_images "
+                "WHERE kind = ? AND position = 0 AND image_model IS NOT NULL", (kind,)
+            ))
+
+    def variant_map(self, kind: str) -> Dict[str, Dict[str, List[str]]]:
+        """All image variants of one kind as {indicator: {image_model: [filenames]}}."""
+        variants: Dict[str, Dict[str, List[str]]] = {}
+        with connect(self.db_path) as conn:
+            for indicator, image_model, filename in conn.execute(
+                "SELECT indicator, image_model, filename FROM image_variants WHERE kind = ? "
+                "ORDER BY indicator, image_model, position", (kind,)
+            ):
+                variants.setdefault(indicator, {}).setdefault(image_model, []).append(filename)
+        return variants
+
+    def scenario_context_map(self) -> Dict[str, str]:
+        with connect(self.db_path) as conn:
+            return dict(conn.execute("SELECT filename, context FROM scenario_context"))
+
+    def meta_map(self) -> Dict[str, str]:
+        with connect(self.db_path) as conn:
+            return dict(conn.execute("SELECT indicator, meta FROM indicator_meta"))
+
+    def all_maps(self) -> Dict[str, dict]:
+        """
+        Every map the viewer needs, keyed "standard", "gamified", "image_models" and
+        "variants" (both per kind), "scenario_context" and "meta".
+        """
+        maps = {kind: self.image_map(kind) for kind in IMAGE_KINDS}
+        maps["image_models"] = {kind: self.image_model_map(kind) for kind in IMAGE_KINDS}
+        maps["variants"] = {kind: self.variant_map(kind) for kind in IMAGE_KINDS}
+        maps["scenario_context"] = self.scenario_context_map()
+        maps["meta"] = self.meta_map()
+        return maps
+
+    def indicators(self, grade: Optional[str] = None, subject: Optional[str] = None,
+                   image_model: Optional[str] = None) -> List[str]:
+        """Indicators with meta matching every given filter."""
+        clauses, params = [], []
+        for column, value in (("grade", grade), ("subject", subject), ("image_model", image_model)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with connect(self.db_path) as conn:
+            return [row[0] for row in conn.execute(f"SELECT indicator FROM indicator_meta{where} ORDER BY indicator", params)]
+
+# --- Snapshot ---
+def db_signature(db_path: str = DEFAULT_DB_PATH):
+    """(mtime_ns, size) of the database and its WAL file; changes on every committed write."""
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def load_maps(db_path: str = DEFAULT_DB_PATH, snapshot_path: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Catalog.all_maps() served from a pickle snapshot when the database has not
+    changed since the snapshot was written, so a cold viewer start skips SQLite.
+    The snapshot is rebuilt (atomically) whenever its version or signature is stale.
+    """
+    snapshot_path = snapshot_path or db_path + ".snapshot"
+    signature = db_signature(db_path)
+    if signature[0] is not None:
+        try:
+            with open(snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot.get("version") == SNAPSHOT_VERSION and snapshot.get("signature") == signature:
+                return snapshot["maps"]
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            pass
+
+    catalog = Catalog(db_path)
+    # Taken before reading: a write that lands mid-read leaves the snapshot stale, not wrong
+    signature = db_signature(db_path)
+    maps = catalog.all_maps()
+    tmp_path = f"{snapshot_path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": SNAPSHOT_VERSION, "signature": signature, "maps": maps}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+    return maps
+
+# --- Migration ---
+def migrate_from_source(filepath: str, catalog: Catalog) -> Dict[str, int]:
+    """
+    Imports the legacy dict literals (STANDARD_IMAGE_MAP, GAMIFIED_IMAGE_MAP,
+    SCENARIO_CONTEXT_MAP, INDICATOR_META_MAP) from a Python source file without
+    executing it. Duplicate keys resolve the way Python does: the last one wins.
+    Returns the number of entries read per map.
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=filepath)
+
+    counts = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict)):
+            continue
+        names = [t.id for t in node.targets if isinstance(t, ast.Name) and t.id in LEGACY_MAPS]
+        if not names:
+            continue
+        target = LEGACY_MAPS[names[0]]
+        entries = [(ast.literal_eval(k), ast.literal_eval(v)) for k, v in zip(node.value.keys, node.value.values)]
+        for key, value in entries:
+            if target in IMAGE_KINDS:
+                catalog.set_images(key, target, value)
+            elif target == "scenario_context":
+                catalog.set_scenario_context(key, value)
+            else:
+                catalog.set_meta(key, value)
+        counts[names[0]] = len(entries)
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Import legacy dict literals into the quiz catalog.")
+    parser.add_argument("source", nargs="?", default=SEED_FILE, help="Python file containing the legacy maps")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Catalog database path")
+    args = parser.parse_args()
+    counts = migrate_from_source(args.source, Catalog(args.db, seed_file=None))
+    for name, count in counts.items():
+        print(f"✅ Imported {count} entries from {name}")
@@ -0,0 +1,226 @@
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog import image_model_of, parse_meta
+from config import DATA_DIR
+from quiz_store import BATCH_FILES, get_store
+
+# --- Compact Records ---
+# Records answer q["question_text"] / opt["label"] like the JSON dicts they replace,
+# so rendering and search code works on either.
+class OptionRecord:
+    __slots__ = ("label", "text")
+    _KEYS = {"label": "label", "text": "text"}
+
+    def __init__(self, label: str, text: str):
+        self.label = sys.intern(label)
+        self.text = text
+
+    def __getitem__(self, key: str):
+        return getattr(self, self._KEYS[key])
+
+    def to_dict(self) -> dict:
+        return {"label": self.label, "text": self.text}
+
+class QuestionRecord:
+    """
+    One question without a per-instance __dict__. The indicator, batch and labels
+    are interned, so the copies repeated across questions and batch files share
+    one string object.
+    """
+    __slots__ = ("indicator", "batch", "question_text", "options", "correct_option_label", "explanation")
+
+    def __init__(self, indicator: str, batch: str, question_text: str, options: Tuple[OptionRecord, ...],
+                 correct_option_label: str, explanation: str):
+        self.indicator = sys.intern(indicator)
+        self.batch = sys.intern(batch)
+        self.question_text = question_text
+        self.options = options
+        self.correct_option_label = sys.intern(correct_option_label)
+        self.explanation = explanation
+
+    @classmethod
+    def from_dict(cls, q: dict, indicator: str, batch: str) -> "QuestionRecord":
+        options = tuple(OptionRecord(opt["label"], opt["text"]) for opt in q["options"])
+        return cls(indicator, batch, q["question_text"], options, q["correct_option_label"], q["explanation"])
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self) -> dict:
+        return {
+            "question_text": self.question_text,
+            "options": [opt.to_dict() for opt in self.options],
+            "correct_option_label": self.correct_option_label,
+            "explanation": self.explanation,
+        }
+
+def compact_questions(questions: Iterable[dict], indicator: str, batch: str) -> List[QuestionRecord]:
+    return [QuestionRecord.from_dict(q, indicator, batch) for q in questions]
+
+def load_records(data_dir: str = DATA_DIR) -> List[QuestionRecord]:
+    """Every question of every batch file (latest record per indicator) as compact records."""
+    records = []
+    for batch, filename in BATCH_FILES.items():
+        store = get_store(os.path.join(data_dir, filename))
+        if not store.exists():
+            continue
+        for indicator, record in store.load_all().items():
+            records.extend(compact_questions(record.get("questions", []), indicator, batch))
+    return records
+
+# --- Columnar Table ---
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("Columnar export and analytics need numpy (installed with streamlit)") from e
+    return np
+
+class QuestionTable:
+    """
+    All questions as NumPy columns, one row per question. Strings that repeat
+    (indicator, batch, image model, grade, subject, answer label) are stored
+    as integer codes into a per-column category list, like a categorical.
+    """
+    CATEGORICAL = ("indicator", "batch", "image_model", "grade", "subject", "correct_option_label")
+
+    def __init__(self, columns: Dict[str, "object"], categories: Dict[str, List[str]]):
+        self.columns = columns
+        self.categories = categories
+
+    @classmethod
+    def from_records(cls, records: List[QuestionRecord], meta_map: Optional[Dict[str, str]] = None) -> "QuestionTable":
+        """`meta_map` ({indicator: 'Grade 3 - Math'}, e.g. Catalog().meta_map()) fills grade and subject."""
+        np = _numpy()
+        meta_map = meta_map or {}
+        lookups: Dict[str, Dict[str, int]] = {name: {} for name in cls.CATEGORICAL}
+        codes: Dict[str, List[int]] = {name: [] for name in cls.CATEGORICAL}
+
+        def encode(name, value):
+            lookup = lookups[name]
+            codes[name].append(lookup.setdefault(value, len(lookup)))
+
+        parsed_meta: Dict[str, Tuple[str, str]] = {}
+        for r in records:
+            if r.indicator not in parsed_meta:
+                grade, subject = parse_meta(meta_map.get(r.indicator, ""))
+                parsed_meta[r.indicator] = (grade or "Unknown", subject or "Unknown")
+            grade, subject = parsed_meta[r.indicator]
+            encode("indicator", r.indicator)
+            encode("batch", r.batch)
+            encode("image_model", image_model_of(r.indicator) or "Unknown")
+            encode("grade", grade)
+            encode("subject", subject)
+            encode("correct_option_label", r.correct_option_label)
+
+        columns = {name: np.asarray(values, dtype=np.int32) for name, values in codes.items()}
+        columns["question_text"] = np.asarray([r.question_text for r in records], dtype=object)
+        columns["question_length"] = np.fromiter((len(r.question_text) for r in records), dtype=np.int32,
+                                                 count=len(records))
+        columns["option_count"] = np.fromiter((len(r.options) for r in records), dtype=np.int8, count=len(records))
+        categories = {name: list(lookup) for name, lookup in lookups.items()}
+        return cls(columns, categories)
+
+    def __len__(self) -> int:
+        return len(self.columns["question_length"])
+
+    def decoded(self, name: str):
+        """A categorical column as strings."""
+        np = _numpy()
+        return np.asarray(self.categories[name], dtype=object)[self.columns[name]]
+
+    def _counts(self, name: str) -> Dict[str, int]:
+        np = _numpy()
+        counts = np.bincount(self.columns[name], minlength=len(self.categories[name]))
+        return {label: int(count) for label, count in zip(self.categories[name], counts)}
+
+    # --- Analytics ---
+    def answer_distribution(self) -> Dict[str, int]:
+        """How often each option label is the correct answer (a skew hints at biased generation)."""
+        return dict(sorted(self._counts("correct_option_label").items()))
+
+    def per_grade_counts(self) -> Dict[str, int]:
+        return dict(sorted(self._counts("grade").items()))
+
+    def length_stats(self) -> Dict[str, float]:
+        """Question text length (characters): count, mean, median, p95, min and max."""
+        np = _numpy()
+        lengths = self.columns["question_length"]
+        if not len(lengths):
+            return {"count": 0}
+        return {
+            "count": int(len(lengths)),
+            "mean": round(float(lengths.mean()), 1),
+            "median": float(np.median(lengths)),
+            "p95": float(np.percentile(lengths, 95)),
+            "min": int(lengths.min()),
+            "max": int(lengths.max()),
+        }
+
+    def length_by_batch(self) -> Dict[str, float]:
+        """Mean question length per batch."""
+        np = _numpy()
+        batch = self.columns["batch"]
+        sums = np.bincount(batch, weights=self.columns["question_length"], minlength=len(self.categories["batch"]))
+        counts = np.bincount(batch, minlength=len(self.categories["batch"]))
+        return {label: round(float(s / c), 1) for label, s, c in zip(self.categories["batch"], sums, counts) if c}
+
+    # --- Export ---
+    def to_arrow(self):
+        """A pyarrow Table; categorical columns become dictionary arrays."""
+        import pyarrow as pa
+        arrays = {}
+        for name, values in self.columns.items():
+            if name in self.categories:
+                arrays[name] = pa.DictionaryArray.from_arrays(values, pa.array(self.categories[name], type=pa.string()))
+            else:
+                arrays[name] = pa.array(values)
+        return pa.table(arrays)
+
+    def write_parquet(self, path: str):
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), path)
+
+    def write_npz(self, path: str):
+        """NumPy fallback when pyarrow is unavailable: codes, numbers and category lists in one .npz."""
+        np = _numpy()
+        arrays = dict(self.columns)
+        for name, values in self.categories.items():
+            arrays[f"{name}__categories"] = np.asarray(values, dtype=object)
+        np.savez_compressed(path, **arrays)
+
+def load_table(data_dir: str = DATA_DIR) -> QuestionTable:
+    from catalog import Catalog
+    return QuestionTable.from_records(load_records(data_dir), Catalog().meta_map())
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Export all questions as columns and print analytics.")
+    parser.add_argument("command", choices=["stats", "export"])
+    parser.add_argument("--output", help="export: .parquet (needs pyarrow) or .npz file")
+    args = parser.parse_args()
+
+    table = load_table()
+    if args.command == "stats":
+        print(json.dumps({
+            "questions": len(table),
+            "answer_distribution": table.answer_distribution(),
+            "per_grade": table.per_grade_counts(),
+            "length": table.length_stats(),
+            "length_by_batch": table.length_by_batch(),
+        }, indent=4))
+    else:
+        output = args.output or os.path.join(DATA_DIR, "questions.parquet")
+        if output.endswith(".npz"):
+            table.write_npz(output)
+        else:
+            table.write_parquet(output)
+        print(f"✅ Exported {len(table)} questions to {output}")
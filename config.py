@@ -0,0 +1,13 @@
+import os
+
+# Directory of the code (seed files, benchmarks)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Generated data (batch files, images, catalog, caches, traces) lives next to the code
+# unless QUIZ_DATA_DIR points elsewhere, e.g. a scratch corpus. Modules read it at import.
+DATA_DIR = os.path.abspath(os.getenv("QUIZ_DATA_DIR", BASE_DIR))
+IMAGE_DIR = os.path.join(DATA_DIR, "indicator_explainer_images")
+
+def data_path(*parts: str) -> str:
+    """A path inside the data directory, independent of the current working directory."""
+    return os.path.join(DATA_DIR, *parts)
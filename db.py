@@ -0,0 +1,25 @@
+import sqlite3
+from contextlib import contextmanager
+
+# Seconds a connection waits on another writer's lock before raising "database is locked"
+BUSY_TIMEOUT = 30
+
+@contextmanager
+def connect(db_path: str):
+    """
+    Short-lived SQLite connection shared by the catalog, response cache and dedup
+    index: the block runs in one transaction (committed on success, rolled back
+    on error) and the connection is always closed.
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def init_db(db_path: str, schema: str):
+    """Creates the schema if needed and enables WAL, so readers never block the writer."""
+    with connect(db_path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(schema)
@@ -0,0 +1,354 @@
+import hashlib
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog import base_indicator_of
+from config import DATA_DIR, data_path
+from db import connect, init_db
+
+DEFAULT_DB_PATH = data_path("dedup_index.db")
+
+# What save_to_json does with near-duplicates: "flag" (warn, keep), "collapse" (drop them) or "off"
+DEDUP_MODE = os.getenv("QUIZ_DEDUP", "flag").lower()
+# Estimated Jaccard similarity of character shingles above which two texts count as near-duplicates;
+# rewording one or two words of a short question lands around 0.7-0.85
+THRESHOLD = 0.7
+
+# MinHash / LSH parameters: 32 bands of 4 rows make texts with similarity 0.7 share a bucket
+# with probability > 0.999, while texts below 0.3 rarely meet
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+# Offset added per bin borrowed during densification; above any in-bin value (hash // NUM_PERM < 2**57)
+_BORROW_OFFSET = 1 << 57
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    doc_id    TEXT PRIMARY KEY,
+    kind      TEXT NOT NULL,
+    record    TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_record ON fingerprints (record);
+
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band   INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, doc_id)
+);
+CREATE INDEX IF NOT EXISTS idx_buckets_doc ON lsh_buckets (doc_id);
+"""
+
+# --- Fingerprints ---
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Character n-grams of the normalised text; short texts give one shingle."""
+    text = normalize(text)
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash: each shingle is hashed once and competes only in the
+    bin its low bits select, so the cost is one pass over the shingles instead of
+    one per permutation. Empty bins borrow the next non-empty bin's minimum
+    (rotation densification), offset by the distance so bins stay distinct.
+    """
+    bins: List[Optional[int]] = [None] * NUM_PERM
+    for shingle in shingles(text):
+        h = _hash64(shingle)
+        b, value = h % NUM_PERM, h // NUM_PERM
+        if bins[b] is None or value < bins[b]:
+            bins[b] = value
+    signature = []
+    for i in range(NUM_PERM):
+        for distance in range(NUM_PERM):
+            value = bins[(i + distance) % NUM_PERM]
+            if value is not None:
+                signature.append(value + distance * _BORROW_OFFSET)
+                break
+    return tuple(signature)
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity: the share of bins whose minimum agrees."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+def band_buckets(signature: Tuple[int, ...]) -> List[int]:
+    """
+    One bucket id per band; signed so it fits an SQLite INTEGER. A band takes every
+    BANDS-th bin, since densification copies values into neighbouring bins.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = struct.pack(f"<{ROWS}Q", *signature[band::BANDS])
+        buckets.append(int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "little", signed=True))
+    return buckets
+
+def _pack(signature: Tuple[int, ...]) -> bytes:
+    return struct.pack(f"<{NUM_PERM}Q", *signature)
+
+def _unpack(blob: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f"<{NUM_PERM}Q", blob)
+
+def model_siblings(record_a: str, record_b: str) -> bool:
+    """
+    True for two records of one indicator saved for different image models
+    ('A:Text [gemini-3-pro-image]' and 'A:Text [gpt-image-2]'); they share their
+    questions by design, so they are never counted as duplicates of each other.
+    """
+    return record_a != record_b and base_indicator_of(record_a) == base_indicator_of(record_b)
+
+# --- Index ---
+class DedupIndex:
+    """
+    Persistent MinHash/LSH index of question and scenario texts. A lookup reads
+    only the documents sharing one of the text's band buckets (indexed), so
+    its cost depends on the number of similar texts, not the corpus size.
+    Documents are grouped by record (e.g. "A:<indicator>") so re-saving a record
+    replaces its fingerprints instead of matching against itself.
+    """
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, threshold: float = THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        init_db(self.db_path, SCHEMA)
+
+
+    # --- Writes ---
+    def add(self, conn, doc_id: str, kind: str, record: str, text: str, signature: Optional[Tuple[int, ...]] = None):
+        signature = signature or minhash(text)
+        conn.execute("DELETE FROM lsh_buckets WHERE doc_id = ?", (doc_id,))
+        conn.execute("INSERT OR REPLACE INTO fingerprints (doc_id, kind, record, text, signature) VALUES (?, ?, ?, ?, ?)",
+                     (doc_id, kind, record, text, _pack(signature)))
+        conn.executemany("INSERT OR IGNORE INTO lsh_buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                         [(band, bucket, doc_id) for band, bucket in enumerate(band_buckets(signature))])
+
+    def remove_record(self, conn, record: str):
+        conn.execute("DELETE FROM lsh_buckets WHERE doc_id IN (SELECT doc_id FROM fingerprints WHERE record = ?)", (record,))
+        conn.execute("DELETE FROM fingerprints WHERE record = ?", (record,))
+
+    # --- Reads ---
+    def _similar(self, conn, signature: Tuple[int, ...], kind: str, exclude_record: Optional[str] = None) -> List[dict]:
+        candidates = set()
+        for band, bucket in enumerate(band_buckets(signature)):
+            candidates.update(row[0] for row in conn.execute(
+                "SELECT doc_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+        matches = []
+        for doc_id in candidates:
+            row = conn.execute("SELECT kind, record, text, signature FROM fingerprints WHERE doc_id = ?",
+                               (doc_id,)).fetchone()
+            if row is None or row[0] != kind or (exclude_record and model_siblings(row[1], exclude_record)):
+                continue
+            score = similarity(signature, _unpack(row[3]))
+            if score >= self.threshold:
+                matches.append({"doc_id": doc_id, "record": row[1], "text": row[2], "similarity": score})
+        return sorted(matches, key=lambda m: -m["similarity"])
+
+    def find_similar(self, text: str, kind: str = "question") -> List[dict]:
+        """Indexed texts of `kind` that are near-duplicates of `text`, most similar first."""
+        with connect(self.db_path) as conn:
+            return self._similar(conn, minhash(text), kind)
+
+    # --- Save-time Checks ---
+    def screen_questions(self, batch: str, indicator: str, questions: List[dict],
+                         collapse: bool = False) -> Tuple[List[dict], List[dict]]:
+        """
+        Checks a batch of questions about to be saved against the index (and each
+        other), then indexes the ones kept. Returns (questions to save, duplicates),
+        each duplicate being {"question_text", "doc_id", "record", "similarity"}.
+        With collapse=True the near-duplicates are left out of the questions to save.
+        Records of the same indicator for other image models are not compared.
+        """
+        record = f"{batch}:{indicator}"
+        kept, duplicates, seen = [], [], []
+        with connect(self.db_path) as conn:
+            # A re-save replaces the record, so its previous questions are not duplicates of it
+            self.remove_record(conn, record)
+            for q in questions:
+                signature = minhash(q["question_text"])
+                matches = self._similar(conn, signature, "question", record)
+                matches += [{"doc_id": doc_id, "record": record, "similarity": similarity(signature, other)}
+                            for doc_id, other in seen if similarity(signature, other) >= self.threshold]
+                if matches:
+                    best = max(matches, key=lambda m: m["similarity"])
+                    duplicates.append({"question_text": q["question_text"], "doc_id": best["doc_id"],
+                                       "record": best["record"], "similarity": best["similarity"]})
+                    if collapse:
+                        continue
+                doc_id = f"{record}:{len(kept)}"
+                self.add(conn, doc_id, "question", record, q["question_text"], signature)
+                seen.append((doc_id, signature))
+                kept.append(q)
+        return kept, duplicates
+
+    def screen_scenario(self, filename: str, context: str, indicator: Optional[str] = None) -> List[dict]:
+        """
+        Indexes a scenario context and returns the other scenarios it nearly duplicates.
+        `indicator` ('Text [gpt-image-2]') keys the record, so the same scenario drawn
+        for another image model is not reported; without it the filename is used.
+        """
+        record = f"scenario:{indicator or filename}"
+        signature = minhash(context)
+        with connect(self.db_path) as conn:
+            self.remove_record(conn, record)
+            matches = self._similar(conn, signature, "scenario", record)
+            self.add(conn, f"scenario:{filename}", "scenario", record, context, signature)
+        return matches
+
+    # --- Corpus ---
+    def rebuild(self, question_records: Iterable[Tuple[str, str, List[dict]]], scenarios: Dict[str, str],
+                scenario_indicators: Optional[Dict[str, str]] = None) -> int:
+        """
+        Re-indexes the whole corpus: (batch, indicator, questions) triples, {filename: context}
+        and, for the scenarios, {filename: indicator} (see scenario_indicators()).
+        """
+        scenario_indicators = scenario_indicators or {}
+        count = 0
+        with connect(self.db_path) as conn:
+            conn.execute("DELETE FROM lsh_buckets")
+            conn.execute("DELETE FROM fingerprints")
+            for batch, indicator, questions in question_records:
+                record = f"{batch}:{indicator}"
+                for i, q in enumerate(questions):
+                    self.add(conn, f"{record}:{i}", "question", record, q["question_text"])
+                    count += 1
+            for filename, context in scenarios.items():
+                record = f"scenario:{scenario_indicators.get(filename, filename)}"
+                self.add(conn, f"scenario:{filename}", "scenario", record, context)
+                count += 1
+        return count
+
+    def report(self) -> dict:
+        """
+        Every cluster of near-duplicates in the index, found from shared LSH
+        buckets (no all-pairs scan) and verified on the full signatures.
+        """
+        parent: Dict[str, str] = {}
+
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        with connect(self.db_path) as conn:
+            signatures, pairs_checked = {}, set()
+
+            def signature_of(doc_id):
+                if doc_id not in signatures:
+                    row = conn.execute("SELECT kind, record, signature FROM fingerprints WHERE doc_id = ?",
+                                       (doc_id,)).fetchone()
+                    signatures[doc_id] = (row[0], row[1], _unpack(row[2]))
+                return signatures[doc_id]
+
+            for band in range(BANDS):
+                for (members,) in conn.execute(
+                    "SELECT GROUP_CONCAT(doc_id, char(31)) FROM lsh_buckets WHERE band = ? "
+                    "GROUP BY bucket HAVING COUNT(*) > 1", (band,)
+                ).fetchall():
+                    docs = sorted(members.split("\x1f"))
+                    for i, a in enumerate(docs):
+                        for b in docs[i + 1:]:
+                            if (a, b) in pairs_checked:
+                                continue
+                            pairs_checked.add((a, b))
+                            (kind_a, record_a, sig_a), (kind_b, record_b, sig_b) = signature_of(a), signature_of(b)
+                            if kind_a == kind_b and not model_siblings(record_a, record_b) \
+                                    and similarity(sig_a, sig_b) >= self.threshold:
+                                parent[find(a)] = find(b)
+
+            clusters: Dict[str, List[str]] = {}
+            for doc_id in list(parent):
+                clusters.setdefault(find(doc_id), []).append(doc_id)
+            clusters = {root: docs for root, docs in clusters.items() if len(docs) > 1}
+
+            details = []
+            for docs in sorted(clusters.values(), key=len, reverse=True):
+                rows = [conn.execute("SELECT doc_id, kind, record, text FROM fingerprints WHERE doc_id = ?",
+                                     (doc_id,)).fetchone() for doc_id in sorted(docs)]
+                details.append({
+                    "kind": rows[0][1],
+                    "size": len(rows),
+                    "records": sorted({row[2] for row in rows}),
+                    "texts": [{"doc_id": row[0], "text": row[3]} for row in rows],
+                })
+            totals = dict(conn.execute("SELECT kind, COUNT(*) FROM fingerprints GROUP BY kind").fetchall())
+
+        return {
+            "threshold": self.threshold,
+            "documents": totals,
+            "candidate_pairs": len(pairs_checked),
+            "clusters": len(details),
+            # Every member of a cluster beyond the first is a repeat
+            "redundant": {kind: sum(c["size"] - 1 for c in details if c["kind"] == kind) for kind in totals},
+            "details": details,
+        }
+
+_index: Optional[DedupIndex] = None
+_index_lock = threading.Lock()
+
+def get_dedup_index() -> DedupIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DedupIndex()
+        return _index
+
+def corpus_records(data_dir: str = DATA_DIR):
+    """(batch, indicator, questions) for the latest record of every indicator in every batch file."""
+    from quiz_store import BATCH_FILES, get_store
+    for batch, filename in BATCH_FILES.items():
+        store = get_store(os.path.join(data_dir, filename))
+        if store.exists():
+            for indicator, record in store.load_all().items():
+                yield batch, indicator, record.get("questions", [])
+
+def scenario_indicators(catalog) -> Dict[str, str]:
+    """{gamified image filename: indicator with its image model}, as screen_scenario keys them."""
+    indicators = {}
+    for indicator, filenames in catalog.image_map("gamified").items():
+        for filename in filenames:
+            indicators[filename] = indicator
+    for indicator, variants in catalog.variant_map("gamified").items():
+        for image_model, filenames in variants.items():
+            for filename in filenames:
+                indicators[filename] = f"{indicator} [{image_model}]"
+    return indicators
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Near-duplicate index of generated questions and scenarios.")
+    parser.add_argument("command", choices=["rebuild", "report"])
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--output", help="report: write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    index = DedupIndex(threshold=args.threshold)
+    if args.command == "rebuild":
+        from catalog import Catalog
+        catalog = Catalog()
+        count = index.rebuild(corpus_records(), catalog.scenario_context_map(), scenario_indicators(catalog))
+        print(f"✅ Indexed {count} questions and scenario contexts")
+    else:
+        report = index.report()
+        text = json.dumps(report, indent=4, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"📋 {report['clusters']} near-duplicate clusters, redundant: {report['redundant']}")
+        else:
+            print(text)
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import threading
+from typing import Dict, List, Tuple
+
+from config import data_path
+
+CACHE_DIR = data_path(".image_cache")
+
+# Widths (px) generated for every source image; the viewer picks the smallest that fits
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+DEFAULT_FORMAT = "webp"
+QUALITY = 80
+
+_hash_lock = threading.Lock()
+_hash_cache: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+def source_hash(src: str) -> str:
+    """SHA-256 of the source file, memoised on (mtime, size) so it is read only once."""
+    stat = os.stat(src)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        cached = _hash_cache.get(src)
+        if cached and cached[0] == signature:
+            return cached[1]
+    digest = hashlib.sha256()
+    with open(src, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_cache[src] = (signature, value)
+    return value
+
+def pick_width(target: int) -> int:
+    """Smallest derivative width that is at least `target` px (or the largest one)."""
+    for width in DERIVATIVE_WIDTHS:
+        if width >= target:
+            return width
+    return DERIVATIVE_WIDTHS[-1]
+
+def _resolve_format(fmt: str) -> str:
+    if fmt == "webp":
+        from PIL import features
+        if not features.check("webp"):
+            return "jpeg"
+    return fmt
+
+def derivative_path(src: str, width: int, fmt: str = DEFAULT_FORMAT) -> str:
+    """Content-addressed location: identical sources share one set of variants."""
+    digest = source_hash(src)
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return os.path.join(CACHE_DIR, digest[:2], f"{digest}_{width}.{ext}")
+
+def get_derivative(src: str, width: int, fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    Returns the path of `src` resized to at most `width` px wide, encoding it on
+    first request. Never upscales; the aspect ratio is kept.
+    """
+    fmt = _resolve_format(fmt)
+    path = derivative_path(src, width, fmt)
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with Image.open(src) as img:
+        img.thumbnail((width, width * 10))
+        if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        # Write to a temp file first so a concurrent reader never sees a partial image
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        img.save(tmp_path, format=fmt.upper(), quality=QUALITY)
+    os.replace(tmp_path, path)
+    return path
+
+def build_derivatives(src: str, widths=DERIVATIVE_WIDTHS, fmt: str = DEFAULT_FORMAT) -> List[str]:
+    """
+    Pre-generates every variant of a freshly generated image. Best-effort like
+    serve_path: on failure nothing is raised, and the viewer encodes on first request.
+    """
+    try:
+        return [get_derivative(src, width, fmt) for width in widths]
+    except Exception as e:
+        print(f"⚠️ Could not pre-build derivatives of {src}: {e}")
+        return []
+
+def serve_path(src: str, width: int) -> str:
+    """Best variant for display; falls back to the original if it cannot be encoded."""
+    try:
+        return get_derivative(src, pick_width(width))
+    except Exception as e:
+        print(f"⚠️ Could not create derivative of {src}: {e}")
+        return src
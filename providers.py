@@ -0,0 +1,303 @@
+import base64
+import hashlib
+import importlib
+import io
+import os
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+# Add the base BE directory to path so we can import llm_client
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+# HTTP keep-alive pool shared by every image download
+HTTP_POOL_SIZE = 16
+
+@lru_cache(maxsize=None)
+def load_env():
+    """Runs load_dotenv() once per process instead of on every call."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+@lru_cache(maxsize=None)
+def get_http_session():
+    """Pooled, keep-alive requests session reused for every URL download."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Modules imported by preload_modules(); missing optional SDKs are skipped
+PRELOAD_MODULES = (
+    "chat.pipeline_components.llm_client",
+    "google.genai",
+    "openai",
+    "PIL.Image",
+    "requests",
+    "dotenv",
+)
+
+def preload_modules():
+    """Imports the heavy provider SDKs without creating any client (used for background warm-up)."""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+# --- Image Backends ---
+class ImageRejectedError(ValueError):
+    """The provider refused the prompt (e.g. a non-STOP finish reason); retrying it unchanged will not help."""
+
+class ImageBackend:
+    """An image provider. One instance is created per process and shared by all threads."""
+    model_id = ""
+
+    def generate(self, prompt: str, output_path: str):
+        """Writes an image for `prompt` to `output_path` or raises."""
+        raise NotImplementedError
+
+class GeminiImageBackend(ImageBackend):
+    model_id = "gemini-3-pro-image"
+    api_model = "gemini-3-pro-image-preview"
+
+    def __init__(self):
+        load_env()
+        from google import genai
+        from google.genai import types
+        self.types = types
+        project_id = os.getenv("GCP_PROJECT_ID", "alw-dev-433706")
+        self.client = genai.Client(vertexai=True, project=project_id, location="global")
+
+    def generate(self, prompt: str, output_path: str):
+        from PIL import Image
+        types = self.types
+        response = self.client.models.generate_content(
+            model=self.api_model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_modalities=['IMAGE', 'TEXT'],
+                image_config=types.ImageConfig(
+                    aspect_ratio="1:1"
+                ),
+            ),
+        )
+
+        if response.candidates[0].finish_reason != types.FinishReason.STOP:
+            reason = response.candidates[0].finish_reason
+            raise ImageRejectedError(f"Prompt Content Error: {reason}")
+
+        for part in response.candidates[0].content.parts:
+            if part.inline_data:
+                img = Image.open(io.BytesIO(part.inline_data.data))
+                img.save(output_path)
+                return
+        raise ValueError("Response contained no image data")
+
+class OpenAIImageBackend(ImageBackend):
+    model_id = "gpt-image-2"
+
+    def __init__(self):
+        load_env()
+        from openai import OpenAI
+        self.client = OpenAI()
+
+    def generate(self, prompt: str, output_path: str):
+        result = self.client.images.generate(
+            model=self.model_id,
+            prompt=prompt
+        )
+        image_base64 = result.data[0].b64_json
+        if image_base64:
+            image_bytes = base64.b64decode(image_base64)
+        else:
+            # Fallback if URL is returned instead of b64
+            response = get_http_session().get(result.data[0].url, timeout=60)
+            response.raise_for_status()
+            image_bytes = response.content
+        with open(output_path, "wb") as f:
+            f.write(image_bytes)
+
+def _solid_png(width: int = 8, height: int = 8, rgb=(120, 160, 220)) -> bytes:
+    """A tiny valid PNG, so fakes need neither Pillow nor the network."""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    rows = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+class FakeImageBackend(ImageBackend):
+    """
+    Local stand-in with configurable latency (seconds) and failure rate (0-1).
+    A `tail_rate` share of calls takes `tail_latency` instead (a slow tail), and a
+    `reject_rate` share is refused like a non-STOP finish reason.
+    """
+    def __init__(self, model_id: str = "fake-image", latency: float = 0.0, failure_rate: float = 0.0,
+                 tail_rate: float = 0.0, tail_latency: float = 0.0, reject_rate: float = 0.0):
+        self.model_id = model_id
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.reject_rate = reject_rate
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt: str, output_path: str):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.tail_latency if random.random() < self.tail_rate else self.latency)
+        if random.random() < self.reject_rate:
+            raise ImageRejectedError(f"{self.model_id}: simulated Prompt Content Error")
+        if random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.model_id}: simulated provider failure")
+        with open(output_path, "wb") as f:
+            f.write(_solid_png())
+
+# --- Text Backends ---
+class _FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 0, "output_tokens": len(content.split())}
+
+class FakeTextLLM:
+    """
+    Local stand-in for the LangChain chat model returned by LLMClient: supports
+    invoke(), batch() and with_structured_output(schema).invoke(). For a batched
+    schema (one with `items`) it answers every `[id=... batch=...]` request in the
+    prompt, leaving out a `drop_rate` share of them to simulate partial failures.
+    """
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, questions: int = 3, schema=None,
+                 include_raw: bool = False, drop_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.questions = questions
+        self.schema = schema
+        self.include_raw = include_raw
+        self.drop_rate = drop_rate
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        return FakeTextLLM(self.latency, self.failure_rate, self.questions, schema, include_raw, self.drop_rate)
+
+    def invoke(self, prompt: str):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("fake-text: simulated provider failure")
+        if self.schema is None:
+            digest = _digest(prompt)
+            return _FakeMessage(f"A colourful classroom poster ({digest[:12]}) about: {prompt[:60]}\n\n"
+                                f"Welcome to game {digest[12:24]}! Collect {digest[24:32]} badges and "
+                                f"answer to reach level {digest[32:40]}.")
+        if "items" in getattr(self.schema, "__annotations__", {}):
+            parsed = self.schema(items=[
+                {"item_id": item_id, "batch": batch,
+                 "questions": [fake_question(f"{batch} {item_id} {prompt}", i) for i in range(self.questions)]}
+                for item_id, batch in re.findall(r"\[id=(\S+) batch=(\S+)\]", prompt)
+                if random.random() >= self.drop_rate
+            ])
+        else:
+            parsed = self.schema(questions=[fake_question(prompt, i) for i in range(self.questions)])
+        if self.include_raw:
+            return {"raw": _FakeMessage(""), "parsed": parsed, "parsing_error": None}
+        return parsed
+
+    def batch(self, inputs, config=None, return_exceptions: bool = False):
+        def run(prompt):
+            try:
+                return self.invoke(prompt)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+        max_concurrency = (config or {}).get("max_concurrency") or len(inputs) or 1
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            return list(pool.map(run, inputs))
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def fake_question(prompt: str, i: int) -> dict:
+    # Derived from the whole prompt: prompts share their template, so a prefix would
+    # give every indicator the same questions (and the same cached image prompts)
+    words = _digest(f"{i} {prompt}")
+    return {
+        "question_text": f"Question {i + 1}: {' '.join(words[n:n + 8] for n in range(0, len(words), 8))}?",
+        "options": [{"label": label, "text": f"Option {label}"} for label in "ABCD"],
+        "correct_option_label": "ABCD"[i % 4],
+        "explanation": "Because it is the fake answer.",
+    }
+
+# --- Registry ---
+def _default_text_backend(model_type: str):
+    from chat.pipeline_components.llm_client import LLMClient
+    return LLMClient(model_type=model_type).client
+
+_image_factories: Dict[str, Callable[[], ImageBackend]] = {
+    GeminiImageBackend.model_id: GeminiImageBackend,
+    OpenAIImageBackend.model_id: OpenAIImageBackend,
+}
+_text_factories: Dict[str, Callable[[], object]] = {}
+_instances: Dict[tuple, object] = {}
+_registry_lock = threading.Lock()
+
+def register_image_backend(model_id: str, factory: Callable[[], ImageBackend]):
+    """Registers (or replaces) the backend for an image model; drops any cached instance."""
+    with _registry_lock:
+        _image_factories[model_id] = factory
+        _instances.pop(("image", model_id), None)
+
+def register_text_backend(model_type: str, factory: Callable[[], object]):
+    with _registry_lock:
+        _text_factories[model_type] = factory
+        _instances.pop(("text", model_type), None)
+
+def get_image_backend(model_id: str) -> ImageBackend:
+    """The process-wide backend for `model_id`, created on first use."""
+    with _registry_lock:
+        key = ("image", model_id)
+        if key not in _instances:
+            if model_id not in _image_factories:
+                raise ValueError(f"Unknown image model: {model_id}")
+            _instances[key] = _image_factories[model_id]()
+        return _instances[key]
+
+def get_text_llm(model_type: str):
+    """The process-wide chat model for `model_type` (LLMClient(...).client by default)."""
+    with _registry_lock:
+        key = ("text", model_type)
+        if key not in _instances:
+            factory = _text_factories.get(model_type)
+            _instances[key] = factory() if factory else _default_text_backend(model_type)
+        return _instances[key]
+
+def use_fake_providers(text_models=("gemini-2.5-flash",), image_models=("gemini-3-pro-image", "gpt-image-2"),
+                       latency: float = 0.0, failure_rate: float = 0.0, image_latency: Optional[float] = None,
+                       drop_rate: float = 0.0):
+    """
+    Routes the given models to local fakes, e.g. for benchmarks or demos without
+    credentials. `image_latency` defaults to `latency`; `drop_rate` is the share
+    of items a batched structured response leaves out.
+    """
+    image_latency = latency if image_latency is None else image_latency
+    for model_type in text_models:
+        register_text_backend(model_type, lambda: FakeTextLLM(latency, failure_rate, drop_rate=drop_rate))
+    for model_id in image_models:
+        register_image_backend(model_id, lambda model_id=model_id: FakeImageBackend(model_id, image_latency, failure_rate))
+
+# Set QUIZ_FAKE_PROVIDERS=1 to run every generation against the local fakes
+if os.getenv("QUIZ_FAKE_PROVIDERS", "").lower() in ("1", "true", "yes"):
+    use_fake_providers()
@@ -1,16 +1,22 @@
 import os
-import sys
-import json
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-# Add the base BE directory to path so we can import llm_client
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
-if BASE_DIR not in sys.path:
-    sys.path.append(BASE_DIR)
+from catalog import Catalog
+from config import DATA_DIR, IMAGE_DIR
+from dedup import DEDUP_MODE, get_dedup_index
+from quiz_store import BATCH_FILES, get_store
+from image_derivatives import build_derivatives
+from providers import get_image_backend, get_text_llm
+from resilience import ImageGenerationFailed, cached_outcome, failed_outcome, get_image_engine
+from response_cache import cache_key, get_response_cache
+from telemetry import end_span, span, start_span
 
-from chat.pipeline_components.llm_client import LLMClient
+# Text model used for prompts and structured question batches
+TEXT_MODEL = "gemini-2.5-flash"
 
 # --- Pydantic Schemas for Structured JSON ---
 class Option(BaseModel):
@@ -26,193 +32,426 @@ class Question(BaseModel):
 class QuizData(BaseModel):
     questions: List[Question] = Field(description="List of 3 to 4 questions")
 
+# --- Question Prompts ---
+# Pipeline step that produces each question batch
+BATCH_STEPS = {"A": "batch_a", "B": "batch_b", "C": "batch_c"}
+
+def question_prompt(batch: str, indicator: str, scenario_context: Optional[str] = None) -> str:
+    """The question request for one batch (A, B or C; C needs the gamified scenario context)."""
+    if batch == "A":
+        return f"Create 3 multiple-choice questions for students based on this learning indicator: '{indicator}'. The questions should test their understanding of the concept generally. Output as JSON."
+    if batch == "B":
+        return f"Create 3 multiple-choice questions for the indicator: '{indicator}'. These questions should be phrased as if the student is looking at a visual diagram. Use phrases like 'Look at the image' or 'Based on the diagram'. Output as JSON."
+    if batch == "C":
+        return f"Indicator: '{indicator}'. Scenario context: '{scenario_context}'. Create 3 multiple-choice questions where the student plays the game described in the context to solve the problems. Output as JSON."
+    raise ValueError(f"Unknown question batch: {batch}")
+
 # --- Image Generation ---
+class ImageGenerationError(RuntimeError):
+    """An image provider call failed; the message carries the provider's reason."""
+
 def generate_image(prompt: str, output_path: str, model_id: str):
     """
-    Generates an image using either Gemini or OpenAI based on the model_id.
+    Generates an image using the process-wide backend for model_id (see providers.py).
+    Raises ImageGenerationError on failure so the caller (and the trace) sees why.
+    """
+    with span("image.generate", provider=model_id, prompt_bytes=len(prompt.encode("utf-8"))) as s:
+        try:
+            get_image_backend(model_id).generate(prompt, output_path)
+        except Exception as e:
+            raise ImageGenerationError(f"{model_id}: {e}") from e
+        s.set(payload_bytes=os.path.getsize(output_path))
+        print(f"✅ Image generated and saved to {output_path} via {model_id}")
+
+def _record_usage(s, message):
+    """Copies LangChain's usage_metadata token counts onto the span, when the provider reports them."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    s.set(input_tokens=usage.get("input_tokens"), output_tokens=usage.get("output_tokens"))
+
+# --- Cached Model Calls ---
+# Text responses are keyed by model, normalised prompt and output schema, and
+# images by model and prompt (see response_cache.py). The throttle only runs on
+# a cache miss, right before the provider is actually called.
+def invoke_text(get_llm: Callable[[], Any], prompt: str, throttle: Callable[[str], None]) -> str:
+    with span("llm.text", provider=TEXT_MODEL, prompt_bytes=len(prompt.encode("utf-8")), cache_hit=True) as s:
+        def compute():
+            s.set(cache_hit=False)
+            throttle(TEXT_MODEL)
+            message = get_llm().invoke(prompt)
+            _record_usage(s, message)
+            return message.content
+        text = get_response_cache().get_or_compute(cache_key(TEXT_MODEL, prompt), TEXT_MODEL, compute)
+        s.set(payload_bytes=len(text.encode("utf-8")))
+        return text
+
+def invoke_structured(get_llm: Callable[[], Any], prompt: str, throttle: Callable[[str], None]) -> QuizData:
+    with span("llm.structured", provider=TEXT_MODEL, prompt_bytes=len(prompt.encode("utf-8")), cache_hit=True) as s:
+        def compute():
+            s.set(cache_hit=False)
+            throttle(TEXT_MODEL)
+            # include_raw keeps the provider message, and with it the token usage
+            output = get_llm().with_structured_output(QuizData, include_raw=True).invoke(prompt)
+            _record_usage(s, output["raw"])
+            if output.get("parsing_error") or output.get("parsed") is None:
+                raise ValueError(f"Structured output could not be parsed: {output.get('parsing_error')}")
+            return output["parsed"].dict()
+        data = get_response_cache().get_or_compute(cache_key(TEXT_MODEL, prompt, QuizData), TEXT_MODEL, compute)
+        s.set(questions=len(data["questions"]))
+        return QuizData(**data)
+
+def generate_image_cached(prompt: str, output_path: str, model_id: str, throttle: Callable[[str], None],
+                          fallback: bool = True) -> dict:
     """
+    Generates (or reuses a cached) image through the retry/hedging/fallback engine
+    and returns its outcome (see resilience.py); outcome["ok"] is False if every
+    attempt failed. Pass fallback=False when the image must come from model_id.
+    """
+    outcome: Dict[str, Any] = {}
+    def generate(prompt, output_path, model_id):
+        outcome.update(get_image_engine().generate(prompt, output_path, model_id, generate_image, throttle, fallback))
+        return {"model_id": outcome["model_id"]}
     try:
-        if model_id == "gemini-3-pro-image":
-            import os
-            from dotenv import load_dotenv
-            from google import genai
-            from google.genai import types
-            from PIL import Image
-            import io
-            
-            load_dotenv()
-            project_id = os.getenv("GCP_PROJECT_ID", "alw-dev-433706")
-            location = "global"
-            
-            client = genai.Client(vertexai=True, project=project_id, location=location)
-            MODEL_ID = "gemini-3-pro-image-preview"
-            
-            response = client.models.generate_content(
-                model=MODEL_ID,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=['IMAGE', 'TEXT'],
-                    image_config=types.ImageConfig(
-                        aspect_ratio="1:1"
-                    ),
-                ),
-            )
-            
-            if response.candidates[0].finish_reason != types.FinishReason.STOP:
-                reason = response.candidates[0].finish_reason
-                raise ValueError(f"Prompt Content Error: {reason}")
-            
-            for part in response.candidates[0].content.parts:
-                if part.inline_data:
-                    img = Image.open(io.BytesIO(part.inline_data.data))
-                    img.save(output_path)
-                    print(f"✅ Image generated and saved to {output_path} via {model_id}")
-                    return
-
-        elif model_id == "gpt-image-2":
-            from openai import OpenAI
-            import base64
-            
-            client = OpenAI()
-            result = client.images.generate(
-                model="gpt-image-2",
-                prompt=prompt
-            )
-            image_base64 = result.data[0].b64_json
-            if image_base64:
-                image_bytes = base64.b64decode(image_base64)
-                with open(output_path, "wb") as f:
-                    f.write(image_bytes)
-                print(f"✅ Image generated and saved to {output_path} via {model_id}")
-                return
-            else:
-                # Fallback if URL is returned instead of b64
-                import requests
-                img_url = result.data[0].url
-                img_data = requests.get(img_url).content
-                with open(output_path, "wb") as f:
-                    f.write(img_data)
-                print(f"✅ Image downloaded and saved to {output_path} via {model_id}")
-                return
+        entry = get_response_cache().generate_image(prompt, output_path, model_id, generate)
+    except ImageGenerationFailed as e:
+        print(f"⚠️ Error generating image: {e}")
+        return e.outcome
     except Exception as e:
         print(f"⚠️ Error generating image: {e}")
-        pass
+        return failed_outcome(model_id, e)
+    if not outcome:
+        # Served from the response cache (by us or by a concurrent identical request)
+        outcome = cached_outcome(model_id, entry.get("model_id", model_id))
+    return outcome
 
-# --- Helper logic to update python file variables ---
-def update_python_dictionary_in_file(filepath: str, dict_name: str, key: str, value: any):
+# --- Step Scheduler ---
+def iter_step_graph(steps: Dict[str, Tuple[List[str], Callable[[Dict[str, Any]], Any]]], max_workers: int = 5,
+                    completed: Optional[Dict[str, Any]] = None, parent_span=None):
     """
-    Updates a python dictionary in a file using regex and basic formatting.
+    Runs a dependency graph of steps on a thread pool.
+    `steps` maps a step name to (dependency names, fn). Each fn receives the dict of
+    results produced so far. A step starts as soon as all its dependencies finished,
+    so end-to-end latency is bounded by the longest dependency chain.
+    Steps already present in `completed` are not re-run; their stored result is reused.
+    Yields (name, result, seconds) for every step that actually ran, as soon as it finishes.
+    Each step is traced as a `step.<name>` span under `parent_span`.
     """
-    with open(filepath, 'r') as f:
-        content = f.read()
-
-    # Create the string to insert based on type
-    if isinstance(value, list):
-        # Format list as string: ["item1", "item2"]
-        val_str = "[" + ", ".join(f'"{v}"' for v in value) + "]"
-    elif isinstance(value, str):
-        val_str = f'"{value}"'
-    else:
-        val_str = str(value)
-
-    # Find the dictionary
-    pattern = r"(" + dict_name + r"\s*=\s*\{)(.*?)(\})"
-    
-    # We will just insert the new key at the beginning of the dictionary
-    insertion = f'\n    "{key}": {val_str},'
-    
-    def repl(match):
-        return match.group(1) + insertion + match.group(2) + match.group(3)
-        
-    new_content = re.sub(pattern, repl, content, flags=re.DOTALL)
-    
-    with open(filepath, 'w') as f:
-        f.write(new_content)
+    results: Dict[str, Any] = {name: value for name, value in (completed or {}).items() if name in steps}
+    pending = {name: step for name, step in steps.items() if name not in results}
+    running = {}
+
+    def timed(name, fn, inputs):
+        # Worker threads do not inherit the caller's current span, so the parent is passed explicitly
+        with span(f"step.{name}", parent=parent_span) as s:
+            value = fn(inputs)
+        return value, s.duration
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            for name in [n for n, (deps, _) in pending.items() if all(d in results for d in deps)]:
+                deps, fn = pending.pop(name)
+                running[pool.submit(timed, name, fn, dict(results))] = name
+
+            if not running:
+                raise ValueError(f"Unresolvable step dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], seconds = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                print(f"⏱️ {name} finished in {seconds:.2f}s")
+                yield name, results[name], seconds
 
 # --- Generator Pipeline ---
-def generate_quiz_for_indicator(indicator: str, image_model: str = "gemini-3-pro-image"):
+def iter_quiz_generation(indicator: str, image_model: str = "gemini-3-pro-image", max_workers: int = 5,
+                         completed: Optional[Dict[str, Any]] = None,
+                         throttle: Optional[Callable[[str], None]] = None, include_questions: bool = True):
+    """
+    Generates images, maps and Batch A/B/C questions for one indicator, yielding
+    each artifact as soon as it is stored: {"indicator", "step", "result", "seconds"}.
+    Steps: std_prompt (text), std_image / gamified_image (filename in the image
+    directory; their events also carry the image "outcome", including the model
+    that actually drew it after a fallback), gamified_prompt ([image prompt, scenario context]) and
+    batch_a / batch_b / batch_c (list of question dicts).
+    Independent remote calls run concurrently (at most `max_workers` at a time;
+    pass 1 to run them one after another). Steps present in `completed` are
+    reused instead of re-run; every step result is JSON-serialisable.
+    `throttle(model_id)` is called before every remote call, e.g. for rate limiting.
+    With include_questions=False the batch_a/b/c steps are skipped, e.g. so that
+    batched_questions.py can generate them for many indicators at once.
+    """
     # Append the image model to the indicator so that running the same indicator 
     # with different models creates unique side-by-side entries instead of overwriting.
-    indicator = f"{indicator} [{image_model}]"
-    
-    print(f"🚀 Starting generation for: {indicator}")
+    # Prompts use the base indicator so text responses are cached across image models.
+    yield from _iter_pipeline(f"{indicator} [{image_model}]", indicator, [image_model], False,
+                              max_workers, completed, throttle, include_questions)
+
+def iter_model_comparison(indicator: str, image_models: List[str], max_workers: Optional[int] = None,
+                          completed: Optional[Dict[str, Any]] = None,
+                          throttle: Optional[Callable[[str], None]] = None, include_questions: bool = True):
+    """
+    Like iter_quiz_generation, but for several image models in one pass: prompts
+    and questions are generated once and stored under the plain indicator, while
+    the image steps fan out to every model in parallel (steps `std_image:<model>`
+    and `gamified_image:<model>`) and are stored as per-model variants in the
+    catalog. The first model's images also become the indicator's default images.
+    Provider fallback is off, so every variant really comes from its model. A
+    model that fails does not fail the comparison: its image steps give a None
+    result and an event whose "outcome" carries the error, the other steps
+    finish, and passing the results back as `completed` retries only those.
+    By default every step may run at once, so N models take about as long as one.
+    """
+    image_models = list(dict.fromkeys(image_models))
+    if not image_models:
+        raise ValueError("At least one image model is required")
+    yield from _iter_pipeline(indicator, indicator, image_models, True,
+                              max_workers or 3 + 2 * len(image_models), completed, throttle, include_questions)
+
+def image_step(step: str, image_model: str, compare: bool) -> str:
+    """Name of an image step ("std_image" / "gamified_image") for one model."""
+    return f"{step}:{image_model}" if compare else step
+
+def _iter_pipeline(indicator: str, base_indicator: str, image_models: List[str], compare: bool,
+                   max_workers: int, completed: Optional[Dict[str, Any]],
+                   throttle: Optional[Callable[[str], None]], include_questions: bool):
+    print(f"🚀 Starting generation for: {indicator} ({', '.join(image_models)})")
     
-    # Initialize Gemini 3.1 Flash client
-    llm_client = LLMClient(model_type='gemini-2.5-flash')
-    llm = llm_client.client
-    structured_llm = llm.with_structured_output(QuizData)
+    # Gemini 3.1 Flash client, shared across generations and created on first
+    # use: a fully cached (or offline) run never needs it
+    def get_llm():
+        return get_text_llm(TEXT_MODEL)
     
     # Base paths
-    image_dir = os.path.join(os.path.dirname(__file__), "indicator_explainer_images")
+    base_dir = DATA_DIR
+    catalog = Catalog()
+    trace = start_span("generate_quiz", indicator=indicator, provider=",".join(image_models))
+    image_dir = IMAGE_DIR
     os.makedirs(image_dir, exist_ok=True)
     
-    # --- Batch A: Standard Image & General Questions ---
-    print("⏳ Generating Batch A (Standard)...")
-    prompt_res = llm.invoke(f"Write a short, descriptive prompt for an AI image generator to create a highly visual, educational infographic/illustration for kids explaining this concept: '{indicator}'. Just return the prompt text.")
-    std_image_prompt = prompt_res.content.strip()
+    # The base indicator names the files; the model name is appended to avoid overwriting
+    clean_indicator_name = base_indicator[:50].replace(" ", "_").replace(".", "")
+    
+    def wait_for(model_id):
+        if throttle:
+            throttle(model_id)
+    
+    def ask(prompt):
+        return invoke_text(get_llm, prompt, wait_for)
+    
+    def ask_quiz(prompt):
+        return invoke_structured(get_llm, prompt, wait_for)
     
-    # Generate Standard Image
-    # Extract the base indicator for the filename, but ensure the model name is appended to avoid overwriting
-    clean_indicator_name = indicator.replace(f" [{image_model}]", "")[:50].replace(" ", "_").replace(".", "")
-    std_image_filename = f"std_{clean_indicator_name}_{image_model}.jpg"
-    generate_image(std_image_prompt, os.path.join(image_dir, std_image_filename), image_model)
+    default_images_lock = threading.Lock()
     
-    # Update dicts
-    update_python_dictionary_in_file(os.path.join(os.path.dirname(__file__), "quiz_display.py"), "STANDARD_IMAGE_MAP", indicator, [std_image_filename])
-    update_python_dictionary_in_file(os.path.join(os.path.dirname(__file__), "quiz_display.py"), "INDICATOR_META_MAP", indicator, "Generated - New")
+    def store_images(kind, image_model, served_by, filenames):
+        # In a comparison every model gets a variant; the first one is also the default shown by the
+        # viewer, and until it succeeds (or if it fails) whichever model finished first stands in for it
+        if not compare:
+            catalog.set_images(indicator, kind, filenames, served_by)
+            return
+        catalog.set_variant_images(indicator, kind, image_model, filenames)
+        with default_images_lock:
+            if image_model == image_models[0] or not catalog.get_images(indicator, kind):
+                catalog.set_images(indicator, kind, filenames, served_by)
     
-    # Generate Questions (Batch A)
-    batch_a_prompt = f"Create 3 multiple-choice questions for students based on this learning indicator: '{indicator}'. The questions should test their understanding of the concept generally. Output as JSON."
-    batch_a_data = structured_llm.invoke(batch_a_prompt)
+    # Outcome of every image step that ran (see resilience.py), reported with the step's event
+    image_outcomes: Dict[str, dict] = {}
     
-    # Save Batch A
-    batch_a_file = os.path.join(os.path.dirname(__file__), "quiz_data.json")
-    save_to_json(batch_a_file, indicator, batch_a_data)
+    def make_image(step_name, kind, prefix, ext, image_model, prompt):
+        """
+        Generates one image and returns (filename, model that drew it). After a
+        provider fallback the file is named after the model that actually drew it.
+        In a comparison a failed model gives (None, None) so the other models and
+        the questions still finish; its outcome is reported with the step's event.
+        """
+        filename = f"{prefix}_{clean_indicator_name}_{image_model}.{ext}"
+        path = os.path.join(image_dir, filename)
+        outcome = generate_image_cached(prompt, path, image_model, wait_for, fallback=not compare)
+        image_outcomes[step_name] = outcome
+        if not outcome["ok"]:
+            if compare:
+                print(f"⚠️ No {kind} image from {image_model}: {outcome['error']}")
+                return None, None
+            # Fail the step rather than catalog a file that does not exist
+            raise ImageGenerationError(f"No {kind} image for {indicator} from {image_model}: {outcome['error']}")
+        served_by = outcome["model_id"]
+        if served_by != image_model:
+            filename = f"{prefix}_{clean_indicator_name}_{served_by}_fallback.{ext}"
+            os.replace(path, os.path.join(image_dir, filename))
+            path = os.path.join(image_dir, filename)
+        build_derivatives(path)
+        return filename, served_by
+    
+    # --- Batch A: Standard Image & General Questions ---
+    def std_prompt(results):
+        print("⏳ Generating standard image prompt...")
+        prompt_res = ask(f"Write a short, descriptive prompt for an AI image generator to create a highly visual, educational infographic/illustration for kids explaining this concept: '{base_indicator}'. Just return the prompt text.")
+        return prompt_res.strip()
+    
+    def std_image(image_model):
+        def run(results):
+            std_image_filename, served_by = make_image(image_step("std_image", image_model, compare), "standard",
+                                                       "std", "jpg", image_model, results["std_prompt"])
+            if std_image_filename is None:
+                return None
+            
+            # Update catalog
+            with span("catalog.write", kind="standard", provider=served_by):
+                store_images("standard", image_model, served_by, [std_image_filename])
+                catalog.set_meta(indicator, "Generated - New")
+            return std_image_filename
+        return run
+    
+    def batch_a(results):
+        print("⏳ Generating Batch A (Standard)...")
+        batch_a_data = ask_quiz(question_prompt("A", base_indicator))
+        
+        return save_to_json(os.path.join(base_dir, BATCH_FILES["A"]), indicator, batch_a_data)
 
     # --- Batch B: Image Referenced Questions ---
-    print("⏳ Generating Batch B (Image Referenced)...")
-    batch_b_prompt = f"Create 3 multiple-choice questions for the indicator: '{indicator}'. These questions should be phrased as if the student is looking at a visual diagram. Use phrases like 'Look at the image' or 'Based on the diagram'. Output as JSON."
-    batch_b_data = structured_llm.invoke(batch_b_prompt)
-    
-    batch_b_file = os.path.join(os.path.dirname(__file__), "quiz_data_new.json")
-    save_to_json(batch_b_file, indicator, batch_b_data)
+    def batch_b(results):
+        print("⏳ Generating Batch B (Image Referenced)...")
+        batch_b_data = ask_quiz(question_prompt("B", base_indicator))
+        
+        return save_to_json(os.path.join(base_dir, BATCH_FILES["B"]), indicator, batch_b_data)
 
     # --- Batch C: Gamified Questions ---
-    print("⏳ Generating Batch C (Gamified)...")
-    gamified_prompt_res = llm.invoke(f"Design a fun, gamified scenario for students to learn: '{indicator}'. Provide exactly two paragraphs. First paragraph: A DALL-E/Imagen image generation prompt for the game scene. Second paragraph: A brief context description of the game rules for the student.")
-    parts = gamified_prompt_res.content.split('\n\n')
-    gamified_img_prompt = parts[0].strip() if len(parts) > 0 else "A gamified educational scene."
-    scenario_context = parts[1].strip() if len(parts) > 1 else "Welcome to the game!"
+    def gamified_prompt(results):
+        print("⏳ Generating gamified scenario...")
+        gamified_prompt_res = ask(f"Design a fun, gamified scenario for students to learn: '{base_indicator}'. Provide exactly two paragraphs. First paragraph: A DALL-E/Imagen image generation prompt for the game scene. Second paragraph: A brief context description of the game rules for the student.")
+        parts = gamified_prompt_res.split('\n\n')
+        gamified_img_prompt = parts[0].strip() if len(parts) > 0 else "A gamified educational scene."
+        scenario_context = parts[1].strip() if len(parts) > 1 else "Welcome to the game!"
+        return [gamified_img_prompt, scenario_context]
     
-    gamified_image_filename = f"gamified_{clean_indicator_name}_{image_model}.png"
-    generate_image(gamified_img_prompt, os.path.join(image_dir, gamified_image_filename), image_model)
-    
-    # Update maps
-    update_python_dictionary_in_file(os.path.join(os.path.dirname(__file__), "quiz_display.py"), "GAMIFIED_IMAGE_MAP", indicator, [gamified_image_filename])
-    update_python_dictionary_in_file(os.path.join(os.path.dirname(__file__), "quiz_display.py"), "SCENARIO_CONTEXT_MAP", gamified_image_filename, scenario_context)
+    def gamified_image(image_model):
+        def run(results):
+            gamified_img_prompt, scenario_context = results["gamified_prompt"]
+            gamified_image_filename, served_by = make_image(image_step("gamified_image", image_model, compare),
+                                                            "gamified", "gamified", "png", image_model,
+                                                            gamified_img_prompt)
+            if gamified_image_filename is None:
+                return None
+            
+            # Update catalog
+            with span("catalog.write", kind="gamified", provider=served_by):
+                store_images("gamified", image_model, served_by, [gamified_image_filename])
+                catalog.set_scenario_context(gamified_image_filename, scenario_context)
+            flag_scenario(gamified_image_filename, scenario_context, f"{base_indicator} [{image_model}]")
+            return gamified_image_filename
+        return run
     
-    batch_c_prompt = f"Indicator: '{indicator}'. Scenario context: '{scenario_context}'. Create 3 multiple-choice questions where the student plays the game described in the context to solve the problems. Output as JSON."
-    batch_c_data = structured_llm.invoke(batch_c_prompt)
+    def batch_c(results):
+        print("⏳ Generating Batch C (Gamified)...")
+        _, scenario_context = results["gamified_prompt"]
+        batch_c_data = ask_quiz(question_prompt("C", base_indicator, scenario_context))
+        
+        return save_to_json(os.path.join(base_dir, BATCH_FILES["C"]), indicator, batch_c_data)
     
-    batch_c_file = os.path.join(os.path.dirname(__file__), "quiz_data_gamified.json")
-    save_to_json(batch_c_file, indicator, batch_c_data)
+    # Batch A/B only need the indicator; the gamified images and Batch C only need the gamified prompt.
+    steps = {
+        "std_prompt": ([], std_prompt),
+        "gamified_prompt": ([], gamified_prompt),
+    }
+    if include_questions:
+        steps["batch_a"] = ([], batch_a)
+        steps["batch_b"] = ([], batch_b)
+        steps["batch_c"] = (["gamified_prompt"], batch_c)
+    for image_model in image_models:
+        steps[image_step("std_image", image_model, compare)] = (["std_prompt"], std_image(image_model))
+        steps[image_step("gamified_image", image_model, compare)] = (["gamified_prompt"], gamified_image(image_model))
+    # A comparison variant that failed left a None result; it is retried rather than reused
+    completed = {name: value for name, value in (completed or {}).items() if value is not None}
+    # The root span is closed by hand: a `with` block cannot span the yields of a generator
+    error = None
+    try:
+        for name, result, seconds in iter_step_graph(steps, max_workers=max_workers, completed=completed,
+                                                     parent_span=trace):
+            event = {"indicator": indicator, "step": name, "result": result, "seconds": seconds}
+            if name in image_outcomes:
+                event["outcome"] = image_outcomes[name]
+            yield event
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        end_span(trace, error)
+
+def _run_to_completion(events, on_step_complete: Optional[Callable[[str, Any], None]]) -> Dict[str, float]:
+    pipeline_start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    for event in events:
+        timings[event["step"]] = event["seconds"]
+        if on_step_complete:
+            on_step_complete(event["step"], event["result"])
+    timings["total"] = time.perf_counter() - pipeline_start
     
-    print("🎉 All generations complete!")
+    print(f"🎉 All generations complete in {timings['total']:.2f}s!")
+    return timings
+
+def generate_quiz_for_indicator(indicator: str, image_model: str = "gemini-3-pro-image", max_workers: int = 5,
+                                completed: Optional[Dict[str, Any]] = None,
+                                on_step_complete: Optional[Callable[[str, Any], None]] = None,
+                                throttle: Optional[Callable[[str], None]] = None, include_questions: bool = True):
+    """
+    Runs iter_quiz_generation to completion and returns per-step timings in seconds.
+    `on_step_complete(step, result)` is called after every step that ran, which
+    together with `completed` lets a caller resume an interrupted run.
+    """
+    return _run_to_completion(iter_quiz_generation(indicator, image_model, max_workers, completed, throttle,
+                                                   include_questions), on_step_complete)
+
+def compare_image_models(indicator: str, image_models: List[str], max_workers: Optional[int] = None,
+                         completed: Optional[Dict[str, Any]] = None,
+                         on_step_complete: Optional[Callable[[str, Any], None]] = None,
+                         throttle: Optional[Callable[[str], None]] = None):
+    """Runs iter_model_comparison to completion and returns per-step timings in seconds."""
+    return _run_to_completion(iter_model_comparison(indicator, image_models, max_workers, completed, throttle),
+                              on_step_complete)
 
 def save_to_json(filepath, indicator, quiz_data_pydantic):
-    data = {}
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            try:
-                data = json.load(f)
-            except:
-                pass
-                
-    # Convert pydantic model to dictionary
-    data[indicator] = {
-        "indicator": indicator,
-        "questions": quiz_data_pydantic.dict()["questions"]
-    }
-    
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
+    # Appends one record to the batch's JSONL segment (see quiz_store.py);
+    # cost stays constant as the corpus grows and concurrent saves are locked.
+    # Returns the questions actually saved: with QUIZ_DEDUP=collapse, fewer or none.
+    questions = quiz_data_pydantic.dict()["questions"]
+    with span("store.save", batch_file=os.path.basename(filepath), questions=len(questions)) as s:
+        if DEDUP_MODE in ("flag", "collapse"):
+            questions = screen_duplicates(filepath, indicator, questions, s)
+        if questions:
+            get_store(filepath).append(indicator, questions)
+    return questions
+
+def screen_duplicates(filepath, indicator, questions, s):
+    """Flags (or, with QUIZ_DEDUP=collapse, drops) near-duplicates of questions already saved."""
+    batches = {filename: batch for batch, filename in BATCH_FILES.items()}
+    batch = batches.get(os.path.basename(filepath), os.path.basename(filepath))
+    try:
+        kept, duplicates = get_dedup_index().screen_questions(batch, indicator, questions,
+                                                              collapse=DEDUP_MODE == "collapse")
+    except Exception as e:
+        # The index is advisory; a broken index must never lose generated questions
+        print(f"⚠️ Duplicate check skipped for {indicator}: {e}")
+        return questions
+    s.set(near_duplicates=len(duplicates))
+    for d in duplicates:
+        print(f"⚠️ Near-duplicate question in {batch}:{indicator} (~{d['similarity']:.0%} like {d['record']}): "
+              f"{d['question_text'][:80]}")
+    if not kept:
+        print(f"⚠️ All questions for {batch}:{indicator} duplicate existing ones; nothing saved")
+    return kept
+
+def flag_scenario(filename, scenario_context, indicator):
+    """Warns when a new gamified scenario nearly repeats one already in the catalog."""
+    if DEDUP_MODE not in ("flag", "collapse"):
+        return
+    try:
+        matches = get_dedup_index().screen_scenario(filename, scenario_context, indicator)
+    except Exception as e:
+        print(f"⚠️ Scenario duplicate check skipped for {filename}: {e}")
+        return
+    for m in matches:
+        print(f"⚠️ Scenario for {filename} is ~{m['similarity']:.0%} like {m['record']}")
@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Legacy whole-file JSON per batch; each gets an append-only .jsonl segment next to it
+BATCH_FILES = {
+    "A": "quiz_data.json",
+    "B": "quiz_data_new.json",
+    "C": "quiz_data_gamified.json",
+}
+
+class QuizStore:
+    """
+    Append-only JSONL storage for one batch of quizzes.
+    Each save appends a single `{"indicator": ..., "questions": [...]}` line, so its
+    cost does not grow with the corpus. An in-memory index of byte offsets (latest
+    line per indicator wins) lets one indicator be read without parsing the file.
+    Appends and compaction hold an exclusive file lock, so parallel generators are safe.
+    """
+    def __init__(self, legacy_path: str):
+        self.legacy_path = legacy_path
+        self.path = os.path.splitext(legacy_path)[0] + ".jsonl"
+        self.lock_path = self.path + ".lock"
+        self._lock = threading.RLock()
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._scanned = 0
+        self._inode = None
+        self._records = 0
+        if not os.path.exists(self.path) and os.path.exists(legacy_path):
+            self._import_legacy()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _import_legacy(self):
+        """One-off conversion of the legacy whole-file JSON into a segment."""
+        with open(self.legacy_path, "r", encoding="utf-8") as f:
+            # A corrupt legacy file raises instead of being silently replaced by {}
+            data = json.load(f)
+        with self._file_lock():
+            if not os.path.exists(self.path):
+                self._write_atomic(data.values())
+
+    def _write_atomic(self, records):
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _refresh(self):
+        """Indexes lines appended (by any process) since the last scan."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._offsets, self._scanned, self._inode, self._records = {}, 0, None, 0
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._scanned:
+                # File was compacted (replaced) since the last scan
+                self._offsets, self._scanned, self._inode, self._records = {}, 0, stat.st_ino, 0
+            if stat.st_size == self._scanned:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._scanned)
+                offset = self._scanned
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Partial line from an in-progress append; pick it up next time
+                        break
+                    try:
+                        indicator = json.loads(line)["indicator"]
+                    except (ValueError, KeyError):
+                        print(f"⚠️ Skipping unreadable record at byte {offset} in {self.path}")
+                    else:
+                        self._offsets[indicator] = (offset, len(line))
+                        self._records += 1
+                    offset += len(line)
+                self._scanned = offset
+
+    # --- Writes ---
+    def append(self, indicator: str, questions: List[dict]):
+        record = {"indicator": indicator, "questions": questions}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._file_lock():
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+
+    def compact(self) -> int:
+        """
+        Rewrites the segment with only the latest record per indicator, via a
+        temporary file and an atomic rename. Returns the number of lines dropped.
+        """
+        with self._file_lock():
+            self._refresh()
+            before = self._records
+            records = self.load_all().values()
+            self._write_atomic(records)
+            self._refresh()
+            return before - self._records
+
+    # --- Reads ---
+    def get(self, indicator: str) -> Optional[dict]:
+        self._refresh()
+        with self._lock:
+            location = self._offsets.get(indicator)
+        if location is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(location[0])
+            return json.loads(f.read(location[1]))
+
+    def indicators(self) -> List[str]:
+        self._refresh()
+        with self._lock:
+            return list(self._offsets)
+
+    def load_all(self) -> Dict[str, dict]:
+        """All indicators in first-saved order, each with its latest record."""
+        self._refresh()
+        with self._lock:
+            offsets = dict(self._offsets)
+        data = {}
+        if not offsets:
+            return data
+        with open(self.path, "rb") as f:
+            for indicator, (offset, length) in offsets.items():
+                f.seek(offset)
+                data[indicator] = json.loads(f.read(length))
+        return data
+
+_STORES: Dict[str, QuizStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_store(legacy_path: str) -> QuizStore:
+    """Process-wide store per batch file, so the offset index is built only once."""
+    key = os.path.abspath(legacy_path)
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = QuizStore(key)
+        return _STORES[key]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Maintain the append-only quiz segments.")
+    parser.add_argument("command", choices=["compact"])
+    args = parser.parse_args()
+    from config import data_path
+    for batch, filename in BATCH_FILES.items():
+        store = get_store(data_path(filename))
+        if store.exists():
+            print(f"✅ Batch {batch}: dropped {store.compact()} superseded records")
@@ -0,0 +1,278 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional
+
+from providers import ImageRejectedError
+from telemetry import span
+
+# Where to go when a model keeps failing; each model falls back to the other provider
+FALLBACK_MODELS = {
+    "gemini-3-pro-image": ("gpt-image-2",),
+    "gpt-image-2": ("gemini-3-pro-image",),
+}
+
+# Defaults for ImageRetryEngine (seconds unless noted)
+MAX_ATTEMPTS = 3             # per model, including the first try
+BASE_DELAY = 1.0             # backoff before retry n is BASE_DELAY * 2**(n-1), with full jitter
+MAX_DELAY = 20.0
+ATTEMPT_TIMEOUT = 120.0      # one call is abandoned after this
+DEADLINE = 300.0             # whole request, across retries and fallbacks
+HEDGE_PERCENTILE = 0.95      # a duplicate call starts once an attempt is slower than this percentile...
+HEDGE_MIN_SAMPLES = 20       # ...of this many recent successful calls to the same model
+LATENCY_WINDOW = 200
+
+class ImageGenerationFailed(RuntimeError):
+    """Every attempt (including hedges and fallbacks) failed; `outcome` says what was tried."""
+    def __init__(self, outcome: dict):
+        super().__init__(outcome["error"])
+        self.outcome = outcome
+
+class AttemptTimeout(TimeoutError):
+    pass
+
+def is_retryable(error: BaseException) -> bool:
+    """A rejected prompt (non-STOP finish reason) fails the same way every time; anything else may be transient."""
+    while error is not None:
+        if isinstance(error, ImageRejectedError):
+            return False
+        error = error.__cause__
+    return True
+
+def new_outcome(requested_model: str, **fields) -> dict:
+    """The outcome record ImageRetryEngine.generate() reports, with `fields` filled in."""
+    outcome = {"ok": False, "requested_model": requested_model, "model_id": None, "cached": False, "attempts": [],
+               "retries": 0, "hedges": 0, "fallback": False, "seconds": 0.0, "error": None}
+    outcome.update(fields)
+    return outcome
+
+def failed_outcome(model_id: str, error: BaseException) -> dict:
+    """Outcome for a request that failed before the engine ran (e.g. an offline cache miss)."""
+    return new_outcome(model_id, error=f"{type(error).__name__}: {error}")
+
+def cached_outcome(model_id: str, served_by: str) -> dict:
+    """Outcome for an image copied from the response cache."""
+    return new_outcome(model_id, ok=True, model_id=served_by, cached=True, fallback=served_by != model_id)
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model, for the hedging threshold."""
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, model_id: str, seconds: float):
+        with self.lock:
+            self.samples.setdefault(model_id, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model_id: str, q: float, min_samples: int) -> Optional[float]:
+        with self.lock:
+            values = sorted(self.samples.get(model_id, ()))
+        if len(values) < max(1, min_samples):
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+class ImageRetryEngine:
+    """
+    Runs image calls with exponential-backoff retries, a per-attempt timeout and
+    an overall deadline, hedges an attempt that is slower than the model's recent
+    p95, and falls back to the other provider when a model keeps failing.
+    Each attempt writes to its own temporary file; only the winner is moved to
+    output_path, so an abandoned or losing call can never overwrite the result.
+    """
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                 attempt_timeout: float = ATTEMPT_TIMEOUT, deadline: float = DEADLINE,
+                 hedge_percentile: Optional[float] = HEDGE_PERCENTILE, hedge_min_samples: int = HEDGE_MIN_SAMPLES,
+                 fallback_models: Dict[str, tuple] = FALLBACK_MODELS, max_workers: int = 32):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.fallback_models = fallback_models
+        self.latency = LatencyTracker()
+        # Timed-out calls cannot be interrupted; they finish on this pool in the background
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-attempt")
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    def _attempt_path(self, output_path: str) -> str:
+        with self._counter_lock:
+            self._counter += 1
+            n = self._counter
+        root, ext = os.path.splitext(output_path)
+        # Keep the extension: backends pick the encoding from it
+        return f"{root}.attempt{os.getpid()}_{n}{ext}"
+
+    def generate(self, prompt: str, output_path: str, model_id: str,
+                 attempt_fn: Callable[[str, str, str], None], throttle: Optional[Callable[[str], None]] = None,
+                 fallback: bool = True) -> dict:
+        """
+        Writes an image for `prompt` to `output_path` with `attempt_fn(prompt, path, model_id)`
+        (one provider call that raises on failure) and returns the outcome:
+        {"ok", "requested_model", "model_id" (model that served it), "cached", "attempts"
+        [{"model", "hedge", "seconds", "error"}], "retries", "hedges", "fallback", "seconds", "error"}.
+        Raises ImageGenerationFailed, carrying the outcome, if nothing succeeded.
+        """
+        models = [model_id] + (list(self.fallback_models.get(model_id, ())) if fallback else [])
+        outcome = new_outcome(model_id)
+        start = time.monotonic()
+        deadline_at = start + self.deadline
+
+        with span("image.resilient", provider=model_id) as s:
+            last_error: Optional[BaseException] = None
+            for model in models:
+                # Every provider call counts against max_attempts, including hedges
+                calls = lambda: sum(1 for record in outcome["attempts"] if record["model"] == model)
+                tries = 0
+                while calls() < self.max_attempts:
+                    remaining = deadline_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    if tries:
+                        outcome["retries"] += 1
+                        time.sleep(min(self.backoff(tries), remaining))
+                    tries += 1
+                    if throttle:
+                        throttle(model)
+                    timeout = min(self.attempt_timeout, max(0.0, deadline_at - time.monotonic()))
+                    try:
+                        self._run_attempt(prompt, output_path, model, attempt_fn, timeout, outcome, s, throttle,
+                                          self.max_attempts - calls())
+                    except Exception as e:
+                        last_error = e
+                        if not is_retryable(e):
+                            print(f"⚠️ {model} rejected the prompt; not retrying it on this model")
+                            break
+                        print(f"⚠️ {model} attempt {calls()}/{self.max_attempts} failed: {e}")
+                        continue
+                    outcome.update(ok=True, model_id=model, fallback=model != model_id)
+                    break
+                if outcome["ok"] or time.monotonic() >= deadline_at:
+                    break
+                if model != models[-1]:
+                    print(f"⚠️ Falling back from {model} to the next image provider")
+
+            outcome["seconds"] = round(time.monotonic() - start, 3)
+            s.set(served_by=outcome["model_id"], attempts=len(outcome["attempts"]), retries=outcome["retries"],
+                  hedges=outcome["hedges"], fallback=outcome["fallback"])
+            if not outcome["ok"]:
+                if last_error is None:
+                    last_error = AttemptTimeout(f"deadline of {self.deadline:.1f}s exceeded")
+                outcome["error"] = f"{type(last_error).__name__}: {last_error}"
+                raise ImageGenerationFailed(outcome)
+            if outcome["fallback"]:
+                print(f"⚠️ Image for {model_id} was served by {outcome['model_id']}")
+            return outcome
+
+    def _run_attempt(self, prompt: str, output_path: str, model: str, attempt_fn, timeout: float,
+                     outcome: dict, parent, throttle: Optional[Callable[[str], None]] = None, max_calls: int = 2):
+        """
+        One attempt plus hedges, up to `max_calls` provider calls in all; the first
+        success is moved to output_path. A hedge starts once the attempt is slower
+        than the model's p95, and again whenever a call fails while another is still
+        pending, so a failed hedge does not leave the request waiting on a slow call.
+        The caller throttles the attempt; a hedge waits for `throttle` itself and is
+        dropped without a provider call if the attempt finished in the meantime.
+        """
+        hedge_after = None
+        if self.hedge_percentile is not None:
+            hedge_after = self.latency.percentile(model, self.hedge_percentile, self.hedge_min_samples)
+        # Once closed (a winner was picked, or the attempt failed or timed out), late calls are discarded
+        state = {"closed": False}
+        lock = threading.Lock()
+
+        def call(path: str, record: dict) -> bool:
+            if record["hedge"] and throttle:
+                throttle(model)
+                with lock:
+                    if state["closed"]:
+                        return False
+            started = time.monotonic()
+            try:
+                with span("image.attempt", parent=parent, provider=model, hedge=record["hedge"]):
+                    attempt_fn(prompt, path, model)
+                self.latency.observe(model, time.monotonic() - started)
+                with lock:
+                    if state["closed"]:
+                        return False
+                    state["closed"] = True
+                    record["seconds"] = round(time.monotonic() - started, 3)
+                    os.replace(path, output_path)
+                    return True
+            except Exception as e:
+                with lock:
+                    if not state["closed"]:
+                        record["seconds"] = round(time.monotonic() - started, 3)
+                        record["error"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                if os.path.exists(path):
+                    # Loser of a hedge, or a call that finished after it was abandoned
+                    os.remove(path)
+
+        def launch(hedge: bool):
+            nonlocal launched
+            launched += 1
+            record = {"model": model, "hedge": hedge, "seconds": None, "error": None}
+            outcome["attempts"].append(record)
+            running.add(self.pool.submit(call, self._attempt_path(output_path), record))
+
+        started = time.monotonic()
+        running = set()
+        launched = 0
+        launch(False)
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while running:
+                elapsed = time.monotonic() - started
+                if elapsed >= timeout:
+                    error = AttemptTimeout(f"{model} gave no image within {timeout:.1f}s")
+                    break
+                wait_for = timeout - elapsed
+                if not hedged and hedge_after is not None:
+                    wait_for = min(wait_for, max(0.0, hedge_after - elapsed))
+                done, running = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                failed = False
+                for future in done:
+                    try:
+                        if future.result():
+                            return
+                    except Exception as e:
+                        error = e
+                        failed = failed or is_retryable(e)
+                if not running or launched >= max_calls:
+                    continue
+                if (failed and hedged) or (not hedged and hedge_after is not None
+                                           and time.monotonic() - started >= hedge_after):
+                    hedged = True
+                    outcome["hedges"] += 1
+                    launch(True)
+        finally:
+            with lock:
+                state["closed"] = True
+                for record in outcome["attempts"]:
+                    if record["model"] == model and record["seconds"] is None:
+                        record["seconds"] = round(time.monotonic() - started, 3)
+                        record["error"] = "abandoned: attempt timed out"
+        raise error or AttemptTimeout(f"{model} gave no image")
+
+_engine: Optional[ImageRetryEngine] = None
+_engine_lock = threading.Lock()
+
+def get_image_engine() -> ImageRetryEngine:
+    """Process-wide engine, so latency history (and so the hedging threshold) is shared by all generations."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ImageRetryEngine()
+        return _engine
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from config import data_path
+from db import connect, init_db
+
+CACHE_DIR = data_path(".response_cache")
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+# Set QUIZ_OFFLINE=1 to serve every LLM/image call from the cache and never hit a provider
+OFFLINE = os.getenv("QUIZ_OFFLINE", "").lower() in ("1", "true", "yes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    model_id    TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+"""
+
+class CacheMissError(LookupError):
+    """Raised in offline mode when a call has no cached response."""
+
+def normalize_prompt(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt).strip()
+
+def schema_fingerprint(schema) -> str:
+    """Stable fingerprint of a pydantic model's JSON schema (v1 or v2)."""
+    if schema is None:
+        return ""
+    as_json = schema.model_json_schema() if hasattr(schema, "model_json_schema") else schema.schema()
+    return f"{schema.__name__}:{json.dumps(as_json, sort_keys=True)}"
+
+def cache_key(model_id: str, prompt: str, schema=None) -> str:
+    payload = "\x1f".join([model_id, normalize_prompt(prompt), schema_fingerprint(schema)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Persistent prompt -> response cache with TTL and LRU size bound.
+    get_or_compute() is single-flight: concurrent callers with the same key
+    share one in-flight call instead of each paying for it.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, offline: bool = OFFLINE):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "images")
+        self.db_path = os.path.join(cache_dir, "responses.db")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.offline = offline
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        init_db(self.db_path, SCHEMA)
+
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with connect(self.db_path) as conn:
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, model_id: str, value: Any):
+        now = time.time()
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model_id, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model_id, json.dumps(value), now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count <= self.max_entries:
+            return
+        stale = conn.execute(
+            "SELECT key, value FROM responses ORDER BY accessed_at LIMIT ?", (count - self.max_entries,)
+        ).fetchall()
+        conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in stale])
+        for _, value in stale:
+            blob = json.loads(value)
+            if isinstance(blob, dict) and "blob" in blob:
+                try:
+                    os.remove(os.path.join(self.blob_dir, blob["blob"]))
+                except FileNotFoundError:
+                    pass
+
+    def delete(self, key: str):
+        with connect(self.db_path) as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def get_or_compute(self, key: str, model_id: str, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Cached value for `key`, or the result of `compute()` (stored unless
+        `cacheable(value)` says otherwise). Concurrent callers share one compute.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        if self.offline:
+            raise CacheMissError(f"No cached response for {model_id} (offline mode)")
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            # A previous owner may have stored the value between our get() and claiming the key
+            value = self.get(key)
+            if value is None:
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self.put(key, model_id, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    # --- Image Calls ---
+    def generate_image(self, prompt: str, output_path: str, model_id: str,
+                       generate: Callable[[str, str, str], Any]) -> dict:
+        """
+        Runs `generate(prompt, output_path, model_id)` unless an identical request
+        was cached, in which case the cached image bytes are copied to output_path.
+        A dict returned by `generate` is stored with the entry, which is returned.
+        If its "model_id" names another model (a provider fallback), the entry is
+        filed under that model's key, so the requested model is tried again next time.
+        """
+        key = cache_key(model_id, prompt, None)
+
+        def compute():
+            before = _mtime(output_path)
+            extra = generate(prompt, output_path, model_id)
+            after = _mtime(output_path)
+            if after is None or after == before:
+                raise RuntimeError(f"{model_id} produced no image")
+            shutil.copyfile(output_path, os.path.join(self.blob_dir, key))
+            return {**(extra if isinstance(extra, dict) else {}), "blob": key}
+
+        def served_by_requested_model(entry):
+            served_by = entry.get("model_id", model_id)
+            if served_by == model_id:
+                return True
+            # The blob moves with the entry; left under `key` it would be overwritten once model_id succeeds
+            served_key = cache_key(served_by, prompt, None)
+            os.replace(os.path.join(self.blob_dir, entry["blob"]), os.path.join(self.blob_dir, served_key))
+            entry["blob"] = served_key
+            self.put(served_key, served_by, entry)
+            return False
+
+        entry = self.get_or_compute(key, model_id, compute, served_by_requested_model)
+        blob_path = os.path.join(self.blob_dir, entry["blob"])
+        if not os.path.exists(blob_path):
+            # Blob was removed behind the cache's back: forget the entry and regenerate
+            self.delete(key)
+            entry = self.get_or_compute(key, model_id, compute, served_by_requested_model)
+        shutil.copyfile(blob_path, output_path)
+        return entry
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,228 @@
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from config import data_path
+
+# Spans go to this JSONL file (set QUIZ_TRACE_FILE="" to disable) and, with QUIZ_TRACE_CONSOLE=1, to stdout
+TRACE_FILE = os.getenv("QUIZ_TRACE_FILE", data_path("traces.jsonl"))
+TRACE_CONSOLE = os.getenv("QUIZ_TRACE_CONSOLE", "").lower() in ("1", "true", "yes")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float("inf"))
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+# --- Spans ---
+class Span:
+    """
+    One timed operation with attributes, exported in an OpenTelemetry-like JSON shape.
+    Use via the span() context manager; attributes can be added while it runs.
+    """
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration * 1000, 2),
+            "status": {"code": self.status, "message": self.error},
+            "attributes": self.attributes,
+        }
+
+class JsonlSpanExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+class ConsoleSpanExporter:
+    def export(self, span: Span):
+        status = "✅" if span.status == "OK" else "❌"
+        error = f" ({span.error})" if span.error else ""
+        print(f"{status} span {span.name} {span.duration * 1000:.0f}ms {span.attributes}{error}")
+
+_exporters: List[Any] = []
+if TRACE_FILE:
+    _exporters.append(JsonlSpanExporter(TRACE_FILE))
+if TRACE_CONSOLE:
+    _exporters.append(ConsoleSpanExporter())
+
+def add_exporter(exporter):
+    """Registers another exporter: any object with an export(span) method."""
+    _exporters.append(exporter)
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes) -> Span:
+    """Starts a span that is not bound to a `with` block (e.g. one spanning a generator); see end_span()."""
+    return Span(name, parent if parent is not None else _current_span.get(), attributes)
+
+def end_span(s: Span, error: Optional[BaseException] = None):
+    """Finishes a span: records the failure reason (if any), feeds metrics and exports it."""
+    if error is not None:
+        s.status = "ERROR"
+        s.error = f"{type(error).__name__}: {error}"
+    s.end_ns = time.time_ns()
+    get_metrics().observe_span(s)
+    for exporter in _exporters:
+        try:
+            exporter.export(s)
+        except Exception as e:
+            print(f"⚠️ Span export failed: {e}")
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, **attributes):
+    """
+    Times the enclosed block as a child of `parent` (default: the current span).
+    Exceptions are recorded as the failure reason and re-raised. Latency, status
+    and the numeric attributes payload_bytes / input_tokens / output_tokens /
+    retries also feed the metrics registry.
+    """
+    current = start_span(name, parent, **attributes)
+    token = _current_span.set(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(current, error)
+
+# --- Metrics ---
+class Metrics:
+    """In-process counters and latency histograms, rendered in Prometheus text format."""
+    COUNTED_ATTRIBUTES = ("payload_bytes", "input_tokens", "output_tokens", "retries")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (span name, provider, status) -> [bucket counts..., sum, count]
+        self.histograms: Dict[tuple, List[float]] = {}
+        # (metric, span name, provider) -> total
+        self.counters: Dict[tuple, float] = {}
+        self.last_latency: Dict[str, float] = {}
+
+    def observe_span(self, s: Span):
+        provider = str(s.attributes.get("provider", ""))
+        key = (s.name, provider, s.status)
+        with self.lock:
+            hist = self.histograms.setdefault(key, [0] * len(LATENCY_BUCKETS) + [0.0, 0])
+            hist[bisect_left(LATENCY_BUCKETS, s.duration)] += 1
+            hist[-2] += s.duration
+            hist[-1] += 1
+            self.last_latency[s.name] = s.duration
+            for attribute in self.COUNTED_ATTRIBUTES:
+                value = s.attributes.get(attribute)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    counter = (attribute, s.name, provider)
+                    self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def latency_summary(self, prefix: str = "") -> List[dict]:
+        """Per span name (optionally filtered by prefix): count, failures, mean/last/p95 ms."""
+        rows: Dict[str, dict] = {}
+        with self.lock:
+            for (name, _, status), hist in self.histograms.items():
+                if not name.startswith(prefix):
+                    continue
+                row = rows.setdefault(name, {"step": name, "count": 0, "failures": 0, "_sum": 0.0,
+                                             "_buckets": [0] * len(LATENCY_BUCKETS)})
+                row["count"] += hist[-1]
+                row["_sum"] += hist[-2]
+                row["failures"] += hist[-1] if status != "OK" else 0
+                row["_buckets"] = [a + b for a, b in zip(row["_buckets"], hist[:len(LATENCY_BUCKETS)])]
+            last = dict(self.last_latency)
+
+        summary = []
+        for name, row in sorted(rows.items()):
+            buckets, seen, p95 = row.pop("_buckets"), 0, None
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                seen += count
+                if seen >= 0.95 * row["count"]:
+                    p95 = bound
+                    break
+            row["mean_ms"] = round(row.pop("_sum") / max(1, row["count"]) * 1000, 1)
+            row["last_ms"] = round(last.get(name, 0) * 1000, 1)
+            row["p95_le_ms"] = None if p95 in (None, float("inf")) else p95 * 1000
+            summary.append(row)
+        return summary
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP quiz_span_duration_seconds Latency of instrumented generation steps.",
+            "# TYPE quiz_span_duration_seconds histogram",
+        ]
+        with self.lock:
+            for (name, provider, status), hist in sorted(self.histograms.items()):
+                labels = f'span="{name}",provider="{provider}",status="{status}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, hist):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f'quiz_span_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"quiz_span_duration_seconds_sum{{{labels}}} {hist[-2]}")
+                lines.append(f"quiz_span_duration_seconds_count{{{labels}}} {hist[-1]}")
+            for metric in self.COUNTED_ATTRIBUTES:
+                lines.append(f"# TYPE quiz_{metric}_total counter")
+                for (attribute, name, provider), total in sorted(self.counters.items()):
+                    if attribute == metric:
+                        lines.append(f'quiz_{metric}_total{{span="{name}",provider="{provider}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+_metrics = Metrics()
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves /metrics in Prometheus text format on a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Metrics at http://{host}:{server.server_port}/metrics")
+    return server
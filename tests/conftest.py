@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# Modules read these at import time, so they are set before any test imports them
+os.environ["QUIZ_DATA_DIR"] = tempfile.mkdtemp(prefix="quiz_tests_")
+os.environ["QUIZ_TRACE_FILE"] = ""
+os.environ["QUIZ_DEDUP"] = "off"
+os.environ.pop("QUIZ_OFFLINE", None)
+os.environ.pop("QUIZ_FAKE_PROVIDERS", None)
+
+@pytest.fixture(autouse=True)
+def fresh_state(tmp_path, monkeypatch):
+    """Every test gets its own response cache and retry engine, so nothing is served from an earlier test."""
+    import resilience
+    import response_cache
+    monkeypatch.setattr(response_cache, "_cache", response_cache.ResponseCache(str(tmp_path / "response_cache")))
+    monkeypatch.setattr(resilience, "_engine", None)
+
+@pytest.fixture
+def step_spans(monkeypatch):
+    """Collects the `step.<name>` spans finished during a test: {name: (start_ns, end_ns)}."""
+    import telemetry
+    spans = {}
+
+    class Recorder:
+        def export(self, s):
+            if s.name.startswith("step."):
+                spans[s.name[len("step."):]] = (s.start_ns, s.end_ns)
+
+    monkeypatch.setattr(telemetry, "_exporters", [Recorder()])
+    return spans
+
+@pytest.fixture
+def flaky_gemini(monkeypatch):
+    """Gemini always fails and gpt-image-2 works; short backoff so the fallback happens quickly."""
+    import providers
+    import resilience
+    from resilience import ImageRetryEngine
+    gemini = providers.FakeImageBackend("gemini-3-pro-image", failure_rate=1.0)
+    gpt = providers.FakeImageBackend("gpt-image-2")
+    providers.register_text_backend("gemini-2.5-flash", lambda: providers.FakeTextLLM())
+    providers.register_image_backend("gemini-3-pro-image", lambda: gemini)
+    providers.register_image_backend("gpt-image-2", lambda: gpt)
+    monkeypatch.setattr(resilience, "_engine", ImageRetryEngine(base_delay=0.001, max_delay=0.01))
+    return gemini, gpt
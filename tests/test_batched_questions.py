@@ -0,0 +1,36 @@
+import pytest
+
+import providers
+from batched_questions import generate_questions_batched, question_items
+
+class UnparsedOnce(providers.FakeTextLLM):
+    """Structured calls fail to parse the first time each prompt is seen, then answer normally."""
+    def __init__(self, seen=None, **kwargs):
+        super().__init__(**kwargs)
+        self.seen = set() if seen is None else seen
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        return UnparsedOnce(self.seen, schema=schema, include_raw=include_raw)
+
+    def invoke(self, prompt: str):
+        if self.schema is not None and prompt not in self.seen:
+            self.seen.add(prompt)
+            if not self.include_raw:
+                return None
+            return {"raw": None, "parsed": None, "parsing_error": ValueError("bad JSON")}
+        return super().invoke(prompt)
+
+@pytest.fixture
+def unparsed_once():
+    providers.register_text_backend("gemini-2.5-flash", lambda: UnparsedOnce())
+
+@pytest.mark.parametrize("use_batch_api", [False, True])
+def test_unparsed_response_fails_only_its_chunk_and_is_retried(unparsed_once, use_batch_api):
+    jobs = [{"key": f"Indicator {n}", "indicator": f"Indicator {n}", "batches": ["A", "B"]} for n in range(4)]
+    items = question_items(jobs)
+
+    result = generate_questions_batched(items, items_per_request=3, use_batch_api=use_batch_api)
+
+    assert not result["failed"]
+    assert set(result["questions"]) == {item["item_id"] for item in items}
+    assert result["rounds"] == 2
@@ -0,0 +1,30 @@
+import argparse
+import time
+
+import pytest
+
+from bulk_generate import RateLimiter, parse_rate
+
+def test_parse_rate():
+    assert parse_rate("gpt-image-2=5") == ("gpt-image-2", 5.0)
+    assert parse_rate("gemini-2.5-flash=0.5") == ("gemini-2.5-flash", 0.5)
+
+@pytest.mark.parametrize("value", ["gpt-image-2=0", "gpt-image-2=-1", "gpt-image-2=nan", "gpt-image-2=fast",
+                                   "gpt-image-2", "=5"])
+def test_parse_rate_rejects_invalid_values(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_rate(value)
+
+def test_rate_limiter_rejects_non_positive_rates():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+def test_rate_limiter_allows_burst_then_waits():
+    limiter = RateLimiter(per_minute=600, burst=2)
+    start = time.monotonic()
+    limiter.acquire()
+    limiter.acquire()
+    assert time.monotonic() - start < 0.05
+    # The bucket is empty: the third call waits for one token at 10 per second
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
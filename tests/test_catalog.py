@@ -0,0 +1,67 @@
+import pickle
+
+import pytest
+
+from catalog import SNAPSHOT_VERSION, Catalog, db_signature, load_maps, migrate_from_source
+
+SOURCE = '''
+import module_that_does_not_exist  # never executed
+
+STANDARD_IMAGE_MAP = {
+    "Fractions [gpt-image-2]": ["std_first.jpg"],
+    "Decimals [gpt-image-2]": ["std_decimals.jpg"],
+    "Fractions [gpt-image-2]": ["std_second.jpg", "std_third.jpg"],
+}
+SCENARIO_CONTEXT_MAP = {"gamified_Fractions.png": "first", "gamified_Fractions.png": "second"}
+INDICATOR_META_MAP = {"Fractions [gpt-image-2]": "Grade 3 - Math"}
+OTHER_MAP = {"ignored": "value"}
+'''
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "catalog.db")
+
+def test_migration_keeps_the_last_value_of_a_duplicate_key(tmp_path, db_path):
+    source = tmp_path / "legacy.py"
+    source.write_text(SOURCE, encoding="utf-8")
+    target = Catalog(db_path, seed_file=None)
+
+    counts = migrate_from_source(str(source), target)
+
+    assert counts == {"STANDARD_IMAGE_MAP": 3, "SCENARIO_CONTEXT_MAP": 2, "INDICATOR_META_MAP": 1}
+    assert target.get_images("Fractions [gpt-image-2]", "standard") == ["std_second.jpg", "std_third.jpg"]
+    assert target.get_images("Decimals [gpt-image-2]", "standard") == ["std_decimals.jpg"]
+    assert target.get_scenario_context("gamified_Fractions.png") == "second"
+    assert target.indicators(grade="Grade 3", subject="Math", image_model="gpt-image-2") == ["Fractions [gpt-image-2]"]
+
+def write_snapshot(path, version, signature, maps):
+    with open(path, "wb") as f:
+        pickle.dump({"version": version, "signature": signature, "maps": maps}, f)
+
+def test_current_snapshot_is_served_without_reading_the_database(db_path):
+    Catalog(db_path, seed_file=None).set_meta("Fractions", "Grade 3 - Math")
+    load_maps(db_path)
+    sentinel = {"meta": {"from": "snapshot"}}
+    write_snapshot(db_path + ".snapshot", SNAPSHOT_VERSION, db_signature(db_path), sentinel)
+
+    assert load_maps(db_path) == sentinel
+
+def test_snapshot_of_an_old_version_is_rebuilt(db_path):
+    Catalog(db_path, seed_file=None).set_meta("Fractions", "Grade 3 - Math")
+    load_maps(db_path)
+    write_snapshot(db_path + ".snapshot", SNAPSHOT_VERSION - 1, db_signature(db_path), {"meta": {}})
+
+    assert load_maps(db_path)["meta"] == {"Fractions": "Grade 3 - Math"}
+    with open(db_path + ".snapshot", "rb") as f:
+        assert pickle.load(f)["version"] == SNAPSHOT_VERSION
+
+def test_snapshot_is_rebuilt_after_the_database_changes(db_path):
+    target = Catalog(db_path, seed_file=None)
+    target.set_meta("Fractions", "Grade 3 - Math")
+    assert load_maps(db_path)["meta"] == {"Fractions": "Grade 3 - Math"}
+    signature = db_signature(db_path)
+
+    target.set_meta("Decimals", "Grade 4 - Math")
+
+    assert db_signature(db_path) != signature
+    assert load_maps(db_path)["meta"] == {"Fractions": "Grade 3 - Math", "Decimals": "Grade 4 - Math"}
@@ -0,0 +1,57 @@
+import pytest
+
+from compact_questions import QuestionRecord, QuestionTable
+
+# Like the table itself, these need numpy (installed with streamlit)
+np = pytest.importorskip("numpy")
+
+def record(indicator, batch, length, label):
+    q = {"question_text": "x" * length, "options": [{"label": l, "text": l} for l in "ABCD"],
+         "correct_option_label": label, "explanation": ""}
+    return QuestionRecord.from_dict(q, indicator, batch)
+
+RECORDS = [
+    record("Fractions [gpt-image-2]", "A", 10, "A"),
+    record("Fractions [gpt-image-2]", "A", 20, "B"),
+    record("Decimals [gemini-3-pro-image]", "B", 30, "A"),
+    record("Ratios", "C", 40, "C"),
+]
+META = {"Fractions [gpt-image-2]": "Grade 3 - Math", "Decimals [gemini-3-pro-image]": "Grade 4 - Math"}
+
+@pytest.fixture
+def table():
+    return QuestionTable.from_records(RECORDS, META)
+
+def test_columns_are_encoded_as_categories(table):
+    assert len(table) == 4
+    assert list(table.decoded("image_model")) == ["gpt-image-2", "gpt-image-2", "gemini-3-pro-image", "Unknown"]
+    assert table.categories["indicator"] == ["Fractions [gpt-image-2]", "Decimals [gemini-3-pro-image]", "Ratios"]
+    assert list(table.columns["option_count"]) == [4, 4, 4, 4]
+
+def test_analytics(table):
+    assert table.answer_distribution() == {"A": 2, "B": 1, "C": 1}
+    assert table.per_grade_counts() == {"Grade 3": 2, "Grade 4": 1, "Unknown": 1}
+    assert table.length_stats() == {"count": 4, "mean": 25.0, "median": 25.0, "p95": 38.5, "min": 10, "max": 40}
+    assert table.length_by_batch() == {"A": 15.0, "B": 30.0, "C": 40.0}
+
+def test_empty_table_has_no_length_stats():
+    assert QuestionTable.from_records([]).length_stats() == {"count": 0}
+
+def test_npz_export_round_trips(table, tmp_path):
+    path = tmp_path / "questions.npz"
+    table.write_npz(str(path))
+
+    with np.load(path, allow_pickle=True) as data:
+        grades = data["grade__categories"][data["grade"]]
+        assert list(grades) == ["Grade 3", "Grade 3", "Grade 4", "Unknown"]
+        assert list(data["question_length"]) == [10, 20, 30, 40]
+
+def test_parquet_export_decodes_categories(table, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "questions.parquet"
+    table.write_parquet(str(path))
+
+    columns = pq.read_table(path).to_pydict()
+    assert columns["batch"] == ["A", "A", "B", "C"]
+    assert columns["correct_option_label"] == ["A", "B", "A", "C"]
+    assert columns["question_length"] == [10, 20, 30, 40]
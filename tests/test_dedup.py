@@ -0,0 +1,90 @@
+import os
+
+import dedup
+import providers
+import quiz_generator
+from config import DATA_DIR
+from catalog import Catalog
+from dedup import DedupIndex, scenario_indicators
+from quiz_generator import iter_model_comparison, iter_quiz_generation
+from quiz_store import BATCH_FILES, get_store
+
+QUESTIONS = [
+    {"question_text": "Which of these animals lays eggs and lives in the water most of its life?"},
+    {"question_text": "How many legs does an insect have when it is fully grown as an adult?"},
+]
+SCENARIO = "Help the frog hop across the pond by answering questions about its life cycle before the sun sets."
+
+def test_records_for_other_image_models_are_not_duplicates(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.db"))
+    index.screen_questions("A", "Animals [gemini-3-pro-image]", QUESTIONS, collapse=True)
+
+    kept, duplicates = index.screen_questions("A", "Animals [gpt-image-2]", QUESTIONS, collapse=True)
+    assert kept == QUESTIONS and not duplicates
+
+    # Another indicator repeating them still is
+    kept, duplicates = index.screen_questions("A", "Wildlife [gpt-image-2]", QUESTIONS, collapse=True)
+    assert not kept and {d["record"] for d in duplicates} <= {"A:Animals [gemini-3-pro-image]",
+                                                              "A:Animals [gpt-image-2]"}
+
+def test_report_does_not_cluster_one_indicator_with_itself(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.db"))
+    index.rebuild([("A", "Animals [gemini-3-pro-image]", QUESTIONS), ("A", "Animals [gpt-image-2]", QUESTIONS)], {})
+    assert index.report()["clusters"] == 0
+
+    index.rebuild([("A", "Animals [gpt-image-2]", QUESTIONS), ("A", "Wildlife [gpt-image-2]", QUESTIONS)], {})
+    assert index.report()["clusters"] == len(QUESTIONS)
+
+def test_collapse_keeps_the_quiz_of_a_second_image_model(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(quiz_generator, "DEDUP_MODE", "collapse")
+    monkeypatch.setattr(dedup, "_index", DedupIndex(str(tmp_path / "dedup.db")))
+    providers.register_text_backend("gemini-2.5-flash", lambda: providers.FakeTextLLM())
+    for model in ("gemini-3-pro-image", "gpt-image-2"):
+        providers.register_image_backend(model, lambda model=model: providers.FakeImageBackend(model))
+        list(iter_quiz_generation("Second model", model))
+
+    for filename in BATCH_FILES.values():
+        records = get_store(os.path.join(DATA_DIR, filename)).load_all()
+        assert "Second model [gemini-3-pro-image]" in records
+        assert records["Second model [gpt-image-2]"]["questions"]
+    out = capsys.readouterr().out
+    assert "Near-duplicate question" not in out and "Scenario for" not in out
+
+def test_scenarios_for_other_image_models_are_not_duplicates(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.db"))
+    assert not index.screen_scenario("gamified_Frogs_gemini.png", SCENARIO, "Frogs [gemini-3-pro-image]")
+    assert not index.screen_scenario("gamified_Frogs_gpt.png", SCENARIO, "Frogs [gpt-image-2]")
+    assert index.report()["clusters"] == 0
+
+    matches = index.screen_scenario("gamified_Ponds_gpt.png", SCENARIO, "Ponds [gpt-image-2]")
+    assert {m["record"] for m in matches} == {"scenario:Frogs [gemini-3-pro-image]", "scenario:Frogs [gpt-image-2]"}
+
+def test_comparison_does_not_flag_its_own_scenarios(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(quiz_generator, "DEDUP_MODE", "flag")
+    monkeypatch.setattr(dedup, "_index", DedupIndex(str(tmp_path / "dedup.db")))
+    providers.use_fake_providers()
+    list(iter_model_comparison("Compared scenarios", ["gemini-3-pro-image", "gpt-image-2"], include_questions=False))
+    assert "Scenario for" not in capsys.readouterr().out
+
+    # A rebuild from the catalog keys the scenarios the same way
+    catalog = Catalog()
+    dedup._index.rebuild([], catalog.scenario_context_map(), scenario_indicators(catalog))
+    assert dedup._index.report()["clusters"] == 0
+
+def test_steps_return_only_the_questions_that_were_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(quiz_generator, "DEDUP_MODE", "collapse")
+    monkeypatch.setattr(dedup, "_index", DedupIndex(str(tmp_path / "dedup.db")))
+    # A second indicator gets the first one's questions, batch for batch
+    fake_question = providers.fake_question
+    monkeypatch.setattr(providers, "fake_question",
+                        lambda prompt, i: fake_question(prompt.replace("Repeat", "Original"), i))
+    providers.use_fake_providers()
+
+    first = {e["step"]: e["result"] for e in iter_quiz_generation("Original", "gpt-image-2")}
+    repeat = {e["step"]: e["result"] for e in iter_quiz_generation("Repeat", "gpt-image-2")}
+
+    assert len(first["batch_a"]) == 3
+    # Batch C differs: its prompt carries the indicator's own scenario
+    assert repeat["batch_a"] == repeat["batch_b"] == [] and len(repeat["batch_c"]) == 3
+    records = get_store(os.path.join(DATA_DIR, BATCH_FILES["A"])).load_all()
+    assert "Repeat [gpt-image-2]" not in records
@@ -0,0 +1,23 @@
+import os
+
+import image_derivatives
+from image_derivatives import build_derivatives, serve_path
+from providers import FakeImageBackend
+
+def test_build_derivatives_encodes_every_width(tmp_path):
+    src = str(tmp_path / "image.png")
+    FakeImageBackend().generate("sample", src)
+
+    paths = build_derivatives(src)
+
+    assert len(paths) == len(image_derivatives.DERIVATIVE_WIDTHS)
+    assert all(os.path.exists(path) for path in paths)
+
+def test_build_derivatives_is_best_effort(tmp_path):
+    src = str(tmp_path / "corrupt.png")
+    with open(src, "wb") as f:
+        f.write(b"not an image")
+
+    assert build_derivatives(src) == []
+    # The viewer falls back to the original
+    assert serve_path(src, 320) == src
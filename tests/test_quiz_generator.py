@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import providers
+from quiz_generator import generate_quiz_for_indicator
+
+TEXT_LATENCY = 0.2
+IMAGE_LATENCY = 0.3
+STEPS = ("std_prompt", "gamified_prompt", "batch_a", "batch_b", "batch_c", "std_image", "gamified_image")
+
+@pytest.fixture
+def slow_providers():
+    """Fake text and image backends with fixed latencies, registered like real providers."""
+    providers.register_text_backend("gemini-2.5-flash", lambda: providers.FakeTextLLM(TEXT_LATENCY))
+    image_backend = providers.FakeImageBackend("gemini-3-pro-image", IMAGE_LATENCY)
+    providers.register_image_backend("gemini-3-pro-image", lambda: image_backend)
+    return image_backend
+
+def test_steps_wait_for_their_dependencies(slow_providers, step_spans):
+    generate_quiz_for_indicator("Dependency order", "gemini-3-pro-image")
+
+    def start(name):
+        return step_spans[name][0]
+
+    def end(name):
+        return step_spans[name][1]
+
+    assert start("std_image") >= end("std_prompt")
+    assert start("gamified_image") >= end("gamified_prompt")
+    assert start("batch_c") >= end("gamified_prompt")
+
+def test_independent_steps_run_concurrently(slow_providers):
+    start = time.perf_counter()
+    generate_quiz_for_indicator("Concurrent run", "gemini-3-pro-image")
+    elapsed = time.perf_counter() - start
+
+    # Longest chain: a prompt followed by its image; everything else overlaps with it
+    longest_chain = TEXT_LATENCY + IMAGE_LATENCY
+    serial = 5 * TEXT_LATENCY + 2 * IMAGE_LATENCY
+    assert longest_chain <= elapsed < longest_chain + 0.4
+    assert elapsed < serial / 2
+
+def test_single_worker_runs_steps_one_at_a_time(slow_providers, step_spans):
+    start = time.perf_counter()
+    generate_quiz_for_indicator("Serial run", "gemini-3-pro-image", max_workers=1)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= 5 * TEXT_LATENCY + 2 * IMAGE_LATENCY
+    intervals = sorted(step_spans.values())
+    for (_, previous_end), (next_start, _) in zip(intervals, intervals[1:]):
+        assert next_start >= previous_end
+
+def test_returns_per_step_timings(slow_providers):
+    timings = generate_quiz_for_indicator("Timings", "gemini-3-pro-image")
+
+    assert set(timings) == set(STEPS) | {"total"}
+    assert timings["std_image"] >= IMAGE_LATENCY
+    assert timings["batch_a"] >= TEXT_LATENCY
+    assert timings["total"] >= max(timings[name] for name in STEPS)
+
+def test_completed_steps_are_not_rerun(slow_providers):
+    first = {}
+    generate_quiz_for_indicator("Resume", "gemini-3-pro-image", on_step_complete=first.__setitem__)
+    calls = slow_providers.calls
+
+    timings = generate_quiz_for_indicator("Resume", "gemini-3-pro-image", completed=first)
+
+    assert set(timings) == {"total"}
+    assert slow_providers.calls == calls
+
+def test_derivative_failure_does_not_fail_the_image_step(slow_providers, monkeypatch):
+    import image_derivatives
+
+    def broken(src, width, fmt=None):
+        raise OSError("encoder unavailable")
+
+    monkeypatch.setattr(image_derivatives, "get_derivative", broken)
+    results = {}
+    generate_quiz_for_indicator("No thumbnails", "gemini-3-pro-image", on_step_complete=results.__setitem__)
+
+    assert set(STEPS) <= set(results)
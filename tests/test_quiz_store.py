@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from quiz_store import QuizStore
+
+def questions(text):
+    return [{"question_text": text}]
+
+@pytest.fixture
+def store(tmp_path):
+    return QuizStore(str(tmp_path / "quiz_data.json"))
+
+def test_latest_line_wins_and_first_saved_order_is_kept(store):
+    store.append("Fractions", questions("old"))
+    store.append("Decimals", questions("decimals"))
+    store.append("Fractions", questions("new"))
+
+    assert store.get("Fractions")["questions"] == questions("new")
+    assert store.indicators() == ["Fractions", "Decimals"]
+    assert [r["questions"] for r in store.load_all().values()] == [questions("new"), questions("decimals")]
+    assert store.get("Percentages") is None
+
+def test_partial_trailing_line_is_skipped_until_it_is_complete(store):
+    store.append("Fractions", questions("fractions"))
+    line = json.dumps({"indicator": "Decimals", "questions": questions("decimals")}) + "\n"
+    with open(store.path, "a", encoding="utf-8") as f:
+        f.write(line[:20])
+
+    assert store.indicators() == ["Fractions"]
+
+    with open(store.path, "a", encoding="utf-8") as f:
+        f.write(line[20:])
+    assert store.get("Decimals")["questions"] == questions("decimals")
+
+def test_appends_by_another_process_are_picked_up(store):
+    store.append("Fractions", questions("fractions"))
+    QuizStore(store.legacy_path).append("Decimals", questions("decimals"))
+    assert store.indicators() == ["Fractions", "Decimals"]
+
+def test_compact_rewrites_atomically_keeping_first_saved_order(store, tmp_path):
+    for indicator, text in [("Fractions", "1"), ("Decimals", "2"), ("Fractions", "3"), ("Ratios", "4")]:
+        store.append(indicator, questions(text))
+    inode = os.stat(store.path).st_ino
+
+    assert store.compact() == 1
+
+    # Replaced by a rename, not rewritten in place, and no temporary file left behind
+    assert os.stat(store.path).st_ino != inode
+    assert not [name for name in os.listdir(tmp_path) if ".tmp" in name]
+    with open(store.path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(r["indicator"], r["questions"]) for r in lines] == [
+        ("Fractions", questions("3")), ("Decimals", questions("2")), ("Ratios", questions("4"))]
+    assert QuizStore(store.legacy_path).get("Fractions")["questions"] == questions("3")
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "quiz_data.json"
+    legacy.write_text(json.dumps({
+        "Fractions": {"indicator": "Fractions", "questions": questions("legacy")},
+        "Decimals": {"indicator": "Decimals", "questions": questions("decimals")},
+    }), encoding="utf-8")
+
+    store = QuizStore(str(legacy))
+    assert store.indicators() == ["Fractions", "Decimals"]
+    store.append("Fractions", questions("new"))
+
+    # The segment is now the source of truth; the legacy file is not read again
+    legacy.write_text(json.dumps({"Ratios": {"indicator": "Ratios", "questions": questions("ratios")}}),
+                      encoding="utf-8")
+    reopened = QuizStore(str(legacy))
+    assert reopened.indicators() == ["Fractions", "Decimals"]
+    assert reopened.get("Fractions")["questions"] == questions("new")
+
+def test_corrupt_legacy_file_raises(tmp_path):
+    legacy = tmp_path / "quiz_data.json"
+    legacy.write_text('{"Fractions": {"indicator": "Fr', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        QuizStore(str(legacy))
+    assert not os.path.exists(tmp_path / "quiz_data.jsonl")
@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+
+import pytest
+
+import providers
+from catalog import Catalog
+from config import IMAGE_DIR
+from quiz_generator import (ImageGenerationError, generate_image, generate_image_cached, iter_model_comparison,
+                            iter_quiz_generation)
+from resilience import ImageRetryEngine
+from response_cache import cache_key, get_response_cache
+
+class CountingThrottle:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, model_id):
+        with self.lock:
+            self.calls += 1
+
+class SlowFirstCall(providers.FakeImageBackend):
+    """The first call hangs long enough to be hedged; later calls are fast."""
+    def generate(self, prompt, output_path):
+        with self.lock:
+            first = self.calls == 0
+        if first:
+            time.sleep(0.5)
+        super().generate(prompt, output_path)
+
+def test_hedged_calls_are_throttled(tmp_path):
+    backend = SlowFirstCall("gemini-3-pro-image", latency=0.01)
+    providers.register_image_backend("gemini-3-pro-image", lambda: backend)
+    engine = ImageRetryEngine(hedge_min_samples=1, attempt_timeout=5)
+    engine.latency.observe("gemini-3-pro-image", 0.05)
+    throttle = CountingThrottle()
+
+    outcome = engine.generate("hedge me", str(tmp_path / "out.png"), "gemini-3-pro-image", generate_image, throttle)
+
+    assert outcome["ok"] and outcome["hedges"] == 1
+    # Let the losing call finish before counting
+    time.sleep(0.6)
+    assert backend.calls == 2
+    assert throttle.calls == backend.calls
+
+class FailingHedge(providers.FakeImageBackend):
+    """The first call hangs, the second (the hedge) fails, later calls are fast."""
+    def generate(self, prompt, output_path):
+        with self.lock:
+            self.calls += 1
+            n = self.calls
+        if n == 1:
+            time.sleep(2.0)
+        elif n == 2:
+            raise RuntimeError("hedge failed")
+        with open(output_path, "wb") as f:
+            f.write(b"image")
+
+def test_failed_hedge_is_replaced_instead_of_waiting_for_the_slow_call(tmp_path):
+    backend = FailingHedge("gemini-3-pro-image")
+    providers.register_image_backend("gemini-3-pro-image", lambda: backend)
+    engine = ImageRetryEngine(hedge_min_samples=1, attempt_timeout=5)
+    engine.latency.observe("gemini-3-pro-image", 0.05)
+
+    outcome = engine.generate("hedge me", str(tmp_path / "out.png"), "gemini-3-pro-image", generate_image)
+
+    assert outcome["ok"] and outcome["hedges"] == 2 and outcome["seconds"] < 1.0
+    assert [r["hedge"] for r in outcome["attempts"]] == [False, True, True]
+
+def test_hedges_count_against_max_attempts(tmp_path):
+    backend = FailingHedge("gemini-3-pro-image")
+    providers.register_image_backend("gemini-3-pro-image", lambda: backend)
+    engine = ImageRetryEngine(max_attempts=2, hedge_min_samples=1, attempt_timeout=5)
+    engine.latency.observe("gemini-3-pro-image", 0.05)
+
+    outcome = engine.generate("hedge me", str(tmp_path / "out.png"), "gemini-3-pro-image", generate_image,
+                              fallback=False)
+
+    # The budget is spent on the primary and one hedge, so the slow primary has to answer
+    assert outcome["ok"] and outcome["hedges"] == 1 and outcome["seconds"] >= 2.0
+    assert len(outcome["attempts"]) == 2
+
+def test_fallback_image_is_named_and_catalogued_after_the_model_that_drew_it(flaky_gemini):
+    events = {e["step"]: e for e in iter_quiz_generation("Fallback naming", "gemini-3-pro-image",
+                                                         include_questions=False)}
+
+    event = events["std_image"]
+    assert event["outcome"]["fallback"] and event["outcome"]["model_id"] == "gpt-image-2"
+    assert event["result"] == "std_Fallback_naming_gpt-image-2_fallback.jpg"
+    assert os.path.exists(os.path.join(IMAGE_DIR, event["result"]))
+    catalog = Catalog()
+    assert catalog.get_images("Fallback naming [gemini-3-pro-image]", "standard") == [event["result"]]
+    assert catalog.image_model_map("standard")["Fallback naming [gemini-3-pro-image]"] == "gpt-image-2"
+
+def test_fallback_image_is_not_cached_for_the_requested_model(flaky_gemini, tmp_path):
+    gemini, gpt = flaky_gemini
+    outcome = generate_image_cached("a diagram", str(tmp_path / "a.png"), "gemini-3-pro-image", lambda m: None)
+    assert outcome["fallback"]
+
+    cache = get_response_cache()
+    assert cache.get(cache_key("gemini-3-pro-image", "a diagram")) is None
+    assert cache.get(cache_key("gpt-image-2", "a diagram"))["model_id"] == "gpt-image-2"
+
+    # Once gemini recovers it is asked again instead of being served the gpt image
+    gemini.failure_rate = 0.0
+    calls = gemini.calls
+    outcome = generate_image_cached("a diagram", str(tmp_path / "b.png"), "gemini-3-pro-image", lambda m: None)
+    assert outcome["model_id"] == "gemini-3-pro-image" and not outcome["cached"]
+    assert gemini.calls == calls + 1
+
+def test_run_fails_when_every_provider_fails(flaky_gemini):
+    gemini, gpt = flaky_gemini
+    gpt.failure_rate = 1.0
+    with pytest.raises(ImageGenerationError):
+        list(iter_quiz_generation("Nothing works", "gemini-3-pro-image", include_questions=False))
+
+def test_comparison_records_a_failing_model_and_finishes_the_rest(flaky_gemini):
+    gemini, gpt = flaky_gemini
+    models = ["gemini-3-pro-image", "gpt-image-2"]
+    events = {e["step"]: e for e in iter_model_comparison("Compared", models)}
+
+    for step in ("std_image", "gamified_image"):
+        failed = events[f"{step}:gemini-3-pro-image"]
+        assert failed["result"] is None and not failed["outcome"]["ok"] and failed["outcome"]["error"]
+        assert events[f"{step}:gpt-image-2"]["result"]
+    assert all(events[step]["result"] for step in ("batch_a", "batch_b", "batch_c"))
+
+    # The first model failed, so the default images come from the one that worked
+    catalog = Catalog()
+    assert catalog.get_images("Compared", "standard") == [events["std_image:gpt-image-2"]["result"]]
+    assert list(catalog.variant_map("standard")["Compared"]) == ["gpt-image-2"]
+
+    # Passing the results back retries only the failed variants
+    gemini.failure_rate = 0.0
+    completed = {step: e["result"] for step, e in events.items()}
+    rerun = {e["step"] for e in iter_model_comparison("Compared", models, completed=completed)}
+    assert rerun == {"std_image:gemini-3-pro-image", "gamified_image:gemini-3-pro-image"}
+    assert set(catalog.variant_map("standard")["Compared"]) == set(models)
+
+class Labelled(providers.FakeImageBackend):
+    """Writes its model id instead of a PNG, so a test can tell which model drew a file."""
+    def generate(self, prompt: str, output_path: str):
+        super().generate(prompt, output_path)
+        with open(output_path, "wb") as f:
+            f.write(self.model_id.encode())
+
+def test_fallback_blob_is_not_overwritten_when_the_requested_model_recovers(flaky_gemini, tmp_path):
+    gemini = Labelled("gemini-3-pro-image", failure_rate=1.0)
+    providers.register_image_backend("gemini-3-pro-image", lambda: gemini)
+    providers.register_image_backend("gpt-image-2", lambda: Labelled("gpt-image-2"))
+
+    assert generate_image_cached("P", str(tmp_path / "1.png"), "gemini-3-pro-image", lambda m: None)["fallback"]
+    gemini.failure_rate = 0.0
+    generate_image_cached("P", str(tmp_path / "2.png"), "gemini-3-pro-image", lambda m: None)
+    outcome = generate_image_cached("P", str(tmp_path / "3.png"), "gpt-image-2", lambda m: None)
+
+    assert outcome["cached"] and outcome["model_id"] == "gpt-image-2"
+    assert (tmp_path / "2.png").read_bytes() == b"gemini-3-pro-image"
+    assert (tmp_path / "3.png").read_bytes() == b"gpt-image-2"
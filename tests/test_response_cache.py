@@ -0,0 +1,38 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import ResponseCache
+
+def test_concurrent_callers_share_one_call(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return {"text": "answer"}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(lambda _: cache.get_or_compute("key", "model", compute), range(8)))
+
+    assert len(calls) == 1
+    assert values == [{"text": "answer"}] * 8
+
+def test_late_caller_rechecks_the_cache_after_claiming_the_key(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("key", "model", "stored by the previous owner")
+    real_get = cache.get
+    lookups = []
+
+    def stale_get(key):
+        # The first lookup ran before the previous owner's put() landed
+        lookups.append(key)
+        return None if len(lookups) == 1 else real_get(key)
+
+    monkeypatch.setattr(cache, "get", stale_get)
+
+    def compute():
+        raise AssertionError("provider called again for a stored response")
+
+    assert cache.get_or_compute("key", "model", compute) == "stored by the previous owner"
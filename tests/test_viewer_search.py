@@ -0,0 +1,47 @@
+import pytest
+
+from viewer_data import SearchIndex, facet_values, filter_indicators
+
+def entry(grade, subject, image_model, *questions):
+    return {"grade": grade, "subject": subject, "image_model": image_model,
+            "questions": [{"question_text": q} for q in questions]}
+
+INDEX = {
+    "Phases of the Moon [gpt-image-2]": entry("Grade 3", "Science", "gpt-image-2",
+                                              "Which moon phase comes after the full moon?"),
+    "Water Cycle [gemini-3-pro-image]": entry("Grade 3", "Science", "gemini-3-pro-image",
+                                              "What happens to water vapour as it cools?"),
+    "Place Value [gpt-image-2]": entry("Grade 4", "Math", "gpt-image-2",
+                                       "What is the value of the digit 7 in 4,712?"),
+    "Moon Craters [gemini-3-pro-image]": entry("Grade 4", "Science", "gemini-3-pro-image",
+                                               "How did the craters on the moon form?"),
+}
+
+@pytest.fixture
+def search_index():
+    return SearchIndex(INDEX)
+
+def test_query_words_match_as_prefixes(search_index):
+    assert search_index.search("mo") == {"Phases of the Moon [gpt-image-2]", "Moon Craters [gemini-3-pro-image]"}
+    # Question text is searched as well as the indicator name, case-insensitively
+    assert search_index.search("VAPOUR") == {"Water Cycle [gemini-3-pro-image]"}
+    assert search_index.search("zebra") == set()
+
+def test_every_query_word_must_match(search_index):
+    assert search_index.search("moon phase") == {"Phases of the Moon [gpt-image-2]"}
+    assert search_index.search("moon digit") == set()
+
+def test_empty_query_matches_everything(search_index):
+    assert search_index.search("") is None
+    assert filter_indicators(INDEX, search_index) == list(INDEX)
+
+def test_facets_combine_with_the_query_in_index_order(search_index):
+    assert filter_indicators(INDEX, search_index, grade="Grade 3") == [
+        "Phases of the Moon [gpt-image-2]", "Water Cycle [gemini-3-pro-image]"]
+    assert filter_indicators(INDEX, search_index, query="moon", subject="Science",
+                             image_model="gemini-3-pro-image") == ["Moon Craters [gemini-3-pro-image]"]
+    assert filter_indicators(INDEX, search_index, query="moon", grade="Grade 4", subject="Math") == []
+
+def test_facet_values_are_sorted_and_unique():
+    assert facet_values(INDEX, "grade") == ["Grade 3", "Grade 4"]
+    assert facet_values(INDEX, "image_model") == ["gemini-3-pro-image", "gpt-image-2"]
@@ -0,0 +1,243 @@
+import importlib
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+
+import streamlit as st
+
+from catalog import db_signature, image_model_of, load_maps, parse_meta
+from config import IMAGE_DIR
+from compact_questions import compact_questions
+from quiz_store import BATCH_FILES, get_store
+
+# --- CONFIGURATION ---
+BASE_IMAGE_PATH = IMAGE_DIR
+
+# --- Cache Instrumentation ---
+class CacheStats:
+    """
+    Call/miss counters per cache, shared by every session of this server process.
+    Cached function bodies only run on a miss, so they count misses themselves.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def _entry(self, name: str) -> Dict[str, int]:
+        return self.counts.setdefault(name, {"calls": 0, "misses": 0})
+
+    def call(self, name: str):
+        with self.lock:
+            self._entry(name)["calls"] += 1
+
+    def miss(self, name: str):
+        with self.lock:
+            self._entry(name)["misses"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {
+                name: {**entry, "hit_rate": 1 - entry["misses"] / max(1, entry["calls"])}
+                for name, entry in self.counts.items()
+            }
+
+@st.cache_resource
+def get_cache_stats() -> CacheStats:
+    return CacheStats()
+
+def _tracked(name: str, fn, *args):
+    get_cache_stats().call(name)
+    return fn(*args)
+
+# --- Signatures (cache keys) ---
+def file_signature(path: str):
+    """(mtime_ns, size) of a file or directory, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def catalog_signature():
+    # WAL mode writes land in the -wal file first, so both files make up the key
+    return db_signature()
+
+# --- Cached Loaders ---
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _catalog_maps(signature):
+    get_cache_stats().miss("catalog")
+    return load_maps()
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _image_files(image_dir: str, signature) -> frozenset:
+    # One directory listing replaces an os.path.exists call per image
+    get_cache_stats().miss("image_dir")
+    if signature is None:
+        return frozenset()
+    return frozenset(os.listdir(image_dir))
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _build_index(selected_file: str, image_kind: str, segment_sig, catalog_sig, images_sig):
+    """
+    Pre-joins questions, images and meta per indicator so a rerun only iterates
+    over ready-made entries. Treat the returned dict as read-only: it is shared.
+    """
+    get_cache_stats().miss("index")
+    records = get_store(selected_file).load_all()
+    maps = _tracked("catalog", _catalog_maps, catalog_sig)
+    image_files = _tracked("image_dir", _image_files, BASE_IMAGE_PATH, images_sig)
+    contexts = maps["scenario_context"]
+    variant_map = maps["variants"][image_kind]
+    # The model that drew the images, which differs from the key's "[model]" suffix after a provider fallback
+    image_models = maps["image_models"][image_kind]
+    batch = next((b for b, name in BATCH_FILES.items() if name == os.path.basename(selected_file)), "?")
+
+    def resolve(files):
+        return [{"file": f, "exists": f in image_files, "context": contexts.get(f)} for f in files]
+
+    index = {}
+    for indicator_name, quiz_content in records.items():
+        # Shared with the catalog maps and the other batches' indices instead of one copy each
+        indicator_name = sys.intern(indicator_name)
+        files = maps[image_kind].get(indicator_name) or []
+        if isinstance(files, str):
+            files = [files]
+        meta = maps["meta"].get(indicator_name, "Grade Unknown - Subject Unknown")
+        grade, subject = parse_meta(meta)
+        # Side-by-side comparisons keep one record with images per model
+        variants = {model: resolve(variant_files) for model, variant_files in variant_map.get(indicator_name, {}).items()}
+        index[indicator_name] = {
+            "meta": meta,
+            "grade": grade or "Unknown",
+            "subject": subject or "Unknown",
+            "image_model": "Comparison" if variants else (image_models.get(indicator_name)
+                                                          or image_model_of(indicator_name) or "Unknown"),
+            # __slots__ records instead of nested dicts; they are read with the same q["..."] keys
+            "questions": compact_questions(quiz_content.get("questions", []), indicator_name, batch),
+            "images": resolve(files),
+            "variants": variants,
+        }
+    return index
+
+def get_viewer_index(selected_file: str, image_kind: str) -> Optional[dict]:
+    """
+    Returns {indicator: {"meta", "questions", "images", "variants"}} for a batch file, or None
+    if it does not exist. Rebuilt only when the segment, catalog or image
+    directory changed on disk.
+    """
+    store = get_store(selected_file)
+    if not store.exists():
+        return None
+    return _tracked(
+        "index", _build_index, os.path.abspath(selected_file), image_kind,
+        file_signature(store.path), catalog_signature(), file_signature(BASE_IMAGE_PATH),
+    )
+
+# --- Search ---
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+class SearchIndex:
+    """
+    Inverted index from lower-cased word to the indicators whose name or question
+    text contains it. Query words match as prefixes via a sorted vocabulary, so a
+    lookup costs O(log V + matches) instead of a scan over every question.
+    """
+    def __init__(self, index: dict):
+        postings: Dict[str, Set[str]] = {}
+        for indicator_name, entry in index.items():
+            texts = [indicator_name] + [q["question_text"] for q in entry["questions"]]
+            for text in texts:
+                for token in tokenize(text):
+                    postings.setdefault(token, set()).add(indicator_name)
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        matches: Set[str] = set()
+        pos = bisect_left(self.vocabulary, prefix)
+        while pos < len(self.vocabulary) and self.vocabulary[pos].startswith(prefix):
+            matches |= self.postings[self.vocabulary[pos]]
+            pos += 1
+        return matches
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """Indicators matching every query word, or None for an empty query."""
+        result = None
+        for token in tokenize(query):
+            matches = self._prefix_matches(token)
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _build_search_index(selected_file: str, image_kind: str, segment_sig, catalog_sig, images_sig) -> SearchIndex:
+    get_cache_stats().miss("search")
+    return SearchIndex(_build_index(selected_file, image_kind, segment_sig, catalog_sig, images_sig))
+
+def get_search_index(selected_file: str, image_kind: str) -> SearchIndex:
+    store = get_store(selected_file)
+    return _tracked(
+        "search", _build_search_index, os.path.abspath(selected_file), image_kind,
+        file_signature(store.path), catalog_signature(), file_signature(BASE_IMAGE_PATH),
+    )
+
+def filter_indicators(index: dict, search_index: SearchIndex, query: str = "", grade: Optional[str] = None,
+                      subject: Optional[str] = None, image_model: Optional[str] = None) -> List[str]:
+    """Indicator names (in index order) matching the search query and every facet given."""
+    matches = search_index.search(query) if query else None
+    names = index.keys() if matches is None else [name for name in index if name in matches]
+    return [
+        name for name in names
+        if (grade is None or index[name]["grade"] == grade)
+        and (subject is None or index[name]["subject"] == subject)
+        and (image_model is None or index[name]["image_model"] == image_model)
+    ]
+
+def facet_values(index: dict, field: str) -> List[str]:
+    return sorted({entry[field] for entry in index.values()})
+
+# --- Background Warm-up ---
+def _warm_up_generator():
+    start = time.perf_counter()
+    try:
+        importlib.import_module("quiz_generator")
+        importlib.import_module("providers").preload_modules()
+        print(f"✅ Generator modules warmed up in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Generator warm-up failed (will import on first use): {e}")
+
+@st.cache_resource
+def start_generator_warm_up() -> threading.Thread:
+    """
+    Imports the generator stack (pydantic, provider SDKs, LangChain) on a daemon
+    thread once per server process, so neither the first paint nor the first
+    Generate click pays for it in the request path.
+    """
+    thread = threading.Thread(target=_warm_up_generator, name="generator-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def clear_caches():
+    """Drops every cached index, e.g. after a generation run in this process."""
+    _catalog_maps.clear()
+    _image_files.clear()
+    _build_index.clear()
+    _build_search_index.clear()
+
+class RerunTimer:
+    """Measures one script rerun; the latest duration is kept in session state."""
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        st.session_state["last_rerun_ms"] = (time.perf_counter() - self.start) * 1000
+        return False